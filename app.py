@@ -1,31 +1,247 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sqlite3
 import time
 import functools
+import json
+import logging
 import os
+import queue
 import threading
-from datetime import datetime, date, timedelta
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, date, timedelta, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from flask import Flask, Response, g, has_request_context, render_template, jsonify, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # Optional: much faster JSON encoding/decoding, stdlib json is used without it
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson (types it can't handle go through Flask's default encoder)"""
+        def dumps(self, obj, **kwargs):
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
+def json_bytes(obj):
+    """Serialize to compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def parse_json(response):
+    """Decode a requests response body as JSON (orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+# Warnings raised on worker threads (pocket release/deletion) go through logging with lazy %-formatting,
+# so concurrent workers don't build messages or contend on stdout themselves
+logger = logging.getLogger(__name__)
+
 # --- CONFIGURATION ---
 URL = "https://api.trycrew.com/willow/graphql"
+GET_SUBACCOUNT_QUERY = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
+GET_SUBACCOUNT_WITH_CHECKING_QUERY = """query GetSubaccountWithChecking($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } currentUser { accounts { subaccounts { id name } } } }"""
+LUNCHFLOW_PRIMARY_HOST = "https://www.lunchflow.app"
+LUNCHFLOW_FALLBACK_HOST = "https://lunchflow.com"
 # In app.py
 DB_FILE = os.environ.get("DB_FILE", "savings_data.db")
+# Legacy env var fallback for the LunchFlow key (read once at startup; the database copy takes precedence)
+LUNCHFLOW_API_KEY = os.environ.get("LUNCHFLOW_API_KEY")
+
+def _apply_pragmas(conn):
+    conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; fsyncs on checkpoint instead of every commit
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # Read pages straight from a 256MB memory map instead of read() copies
+    return conn
+
+def _connect():
+    """Open a SQLite connection with the per-connection PRAGMAs applied (WAL itself is set once in init_db)"""
+    return _apply_pragmas(sqlite3.connect(DB_FILE, check_same_thread=False, cached_statements=SQL_STATEMENT_CACHE_SIZE))
+
+# Schema/migrations run once per process - whichever comes first of init_db() at startup or the first _db() call
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def ensure_schema():
+    """Run init_db() once if it hasn't run in this process yet (e.g. when served by a WSGI server)"""
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            init_db()
+
+def _db():
+    """Open a SQLite connection, making sure the schema exists first"""
+    ensure_schema()
+    return _connect()
+
+# Long-lived connections: a small pool of read-only readers plus one writer shared by all threads
+_READ_POOL_SIZE = 4
+_READ_POOL_TIMEOUT = 10  # Seconds to wait for a free reader before failing the request
+_read_pool = queue.LifoQueue()
+_read_pool_created = 0
+_read_pool_lock = threading.Lock()
+_writer = None
+_write_lock = threading.RLock()  # Serializes writes; reentrant so nested db_write() calls join the outer transaction
+_write_state = threading.local()  # .depth: how many db_write() blocks this thread is inside
+
+def _get_writer():
+    """Return the shared writer connection, opening it on first use (call with _write_lock held)"""
+    global _writer
+    if _writer is None:
+        # isolation_level=None: transactions are managed explicitly by db_write()
+        ensure_schema()
+        _writer = _apply_pragmas(sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False,
+                                                 cached_statements=SQL_STATEMENT_CACHE_SIZE))
+    return _writer
+
+def _checkout_reader():
+    """Take a read-only connection from the pool, opening a new one while under the pool size"""
+    global _read_pool_created
+    try:
+        return _read_pool.get_nowait()
+    except queue.Empty:
+        pass
+
+    with _read_pool_lock:
+        if _read_pool_created < _READ_POOL_SIZE:
+            # Keep the writer open so the WAL/shm files exist for read-only connections
+            with _write_lock:
+                _get_writer()
+            conn = sqlite3.connect(f"{Path(DB_FILE).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False,
+                                   cached_statements=SQL_STATEMENT_CACHE_SIZE)
+            _read_pool_created += 1
+            return _apply_pragmas(conn)
+    try:
+        return _read_pool.get(timeout=_READ_POOL_TIMEOUT)
+    except queue.Empty:
+        raise sqlite3.OperationalError(f"no database reader became free within {_READ_POOL_TIMEOUT}s")
+
+@contextmanager
+def db_read():
+    """Borrow a pooled read-only connection: `with db_read() as c: c.execute(...)`"""
+    conn = _checkout_reader()
+    c = conn.cursor()
+    try:
+        yield c
+    finally:
+        c.close()
+        _read_pool.put(conn)
+
+@contextmanager
+def db_write():
+    """Run writes in one BEGIN IMMEDIATE transaction on the shared writer (commits on success, rolls back on error).
+
+    Don't make network calls inside the block - every other writer waits on the lock.
+    """
+    with _write_lock:
+        conn = _get_writer()
+        depth = getattr(_write_state, "depth", 0)
+        if depth:
+            # Nested call - part of the outer transaction
+            _write_state.depth = depth + 1
+            try:
+                yield conn.cursor()
+            finally:
+                _write_state.depth = depth
+            return
+
+        if conn.in_transaction:
+            # Left open by an earlier COMMIT/ROLLBACK that failed - discard it instead of joining it
+            conn.execute("ROLLBACK")
+        conn.execute("BEGIN IMMEDIATE")
+        _write_state.depth = 1
+        try:
+            yield conn.cursor()
+            conn.execute("COMMIT")
+        except BaseException:
+            # Also covers a failed COMMIT, which leaves the transaction open
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error as e:
+                    print(f"⚠️ Rollback failed on the writer connection: {e}", flush=True)
+            raise
+        finally:
+            _write_state.depth = 0
+
+# Hot queries as constants: sqlite3 caches compiled statements per connection keyed by the exact SQL text,
+# so the pooled connections only parse each of these once
+SQL_STATEMENT_CACHE_SIZE = 256
+SQL_GET_TRANSACTIONS_FOR_ACCOUNT = """SELECT transaction_id, amount, date, merchant, description, is_pending, created_at
+                                      FROM credit_card_transactions
+                                      WHERE account_id = ?
+                                      ORDER BY date DESC, created_at DESC
+                                      LIMIT 100"""
+SQL_GET_TRANSACTIONS = """SELECT transaction_id, amount, date, merchant, description, is_pending, created_at
+                          FROM credit_card_transactions
+                          ORDER BY date DESC, created_at DESC
+                          LIMIT 100"""
+SQL_GET_SIMPLEFIN_ACCESS_URL = "SELECT access_url FROM simplefin_config LIMIT 1"
+SQL_GET_SIMPLEFIN_CONFIG_ID = "SELECT id FROM simplefin_config LIMIT 1"
+SQL_UPDATE_SIMPLEFIN_ACCESS_URL = "UPDATE simplefin_config SET access_url = ?, is_valid = 1 WHERE id = ?"
+SQL_INSERT_SIMPLEFIN_ACCESS_URL = "INSERT INTO simplefin_config (access_url, is_valid) VALUES (?, 1)"
+SQL_INSERT_SIMPLEFIN_ACCOUNT = """INSERT OR IGNORE INTO credit_card_config
+                                  (account_id, account_name, provider, created_at)
+                                  VALUES (?, ?, 'simplefin', CURRENT_TIMESTAMP)"""
+SQL_GET_SIMPLEFIN_POCKET_ID = "SELECT pocket_id FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'"
+SQL_UPDATE_SIMPLEFIN_BALANCE = "UPDATE credit_card_config SET current_balance = ? WHERE account_id = ? AND provider = 'simplefin'"
+SQL_DELETE_SIMPLEFIN_ACCOUNT = "DELETE FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'"
+SQL_DELETE_ACCOUNT_TRANSACTIONS = "DELETE FROM credit_card_transactions WHERE account_id = ?"
+SQL_DELETE_SIMPLEFIN_ACCOUNTS = "DELETE FROM credit_card_config WHERE provider = 'simplefin'"
+SQL_DELETE_SIMPLEFIN_CONFIG = "DELETE FROM simplefin_config"
+SQLITE_MAX_PARAMS = 900  # Bound parameters per statement, under SQLite's historical 999 limit
+
+# Keep-alive session for the frequent Crew GraphQL calls (reuses the TCP/TLS connection between syncs).
+# Only connection failures are retried - the request never reached Crew, so replaying a transfer is safe.
+_crew_session = requests.Session()
+_crew_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3)))
 
 # Global flag to ensure background thread starts only once
 _background_thread_started = False
 _background_thread_lock = threading.Lock()
+_wake_checker = threading.Event()  # Set to run the background checker now instead of after its 30s wait
+_pocket_deletions = queue.Queue()  # Pocket IDs waiting for the background deleter (funds already returned)
 
 # Track last SimpleFin sync time per account (limit to once per hour per account)
-_last_simplefin_sync = {}  # Dictionary: account_id -> timestamp
+_last_simplefin_sync = {}  # Dictionary: account_id -> time.monotonic() of last sync
+_simplefin_lock = threading.Lock()  # Guards _last_simplefin_sync/_simplefin_syncing check-and-set across threads
+_simplefin_syncing = set()  # Account IDs claimed by a sync that hasn't finished yet
 _simplefin_sync_interval = 3600  # 1 hour in seconds
+_simplefin_min_resync = 600  # Never re-sync an account within 10 minutes, whatever the schedule
+_credit_card_sync_workers = 4  # Accounts synced in parallel by the background checker
+_pocket_release_workers = 4  # Pockets emptied and deleted in parallel on disconnect
+# Long-lived pool for pocket releases, so a disconnect doesn't pay for spawning and joining fresh threads
+_pocket_release_executor = ThreadPoolExecutor(max_workers=_pocket_release_workers, thread_name_prefix="pocket-release")
+
+# LunchFlow host used by the background sync (only switches to the fallback after a connection failure)
+_lunchflow_host = LUNCHFLOW_PRIMARY_HOST
+_lunchflow_fallback_since = 0  # When we switched to the fallback host
+_lunchflow_reprobe_interval = 3600  # Retry the primary host at most once an hour
+_lunchflow_balances = {}  # Dictionary: account_id -> (Last-Modified header, balance amount) for conditional GETs
 
 def get_simplefin_sync_interval():
     """Get the SimpleFin sync interval from database or return default"""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         c.execute("SELECT sync_interval FROM simplefin_config LIMIT 1")
         row = c.fetchone()
@@ -41,7 +257,7 @@ def should_sync_simplefin(account_id):
     from datetime import datetime, timezone
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         c.execute("SELECT sync_times, sync_timezone FROM simplefin_config LIMIT 1")
         row = c.fetchone()
@@ -70,18 +286,15 @@ def should_sync_simplefin(account_id):
 
                 # If within 5 minutes of scheduled time, check if we already synced recently
                 if diff <= 5:
-                    last_sync = _last_simplefin_sync.get(account_id, 0)
                     # Only sync if we haven't synced in the last 10 minutes
-                    if time.time() - last_sync > 600:
+                    if seconds_since_simplefin_sync(account_id) > _simplefin_min_resync:
                         return True, f"scheduled time {scheduled_time} UTC"
 
             return False, "not scheduled time"
         else:
             # Fall back to interval-based sync
             sync_interval = get_simplefin_sync_interval()
-            current_time = time.time()
-            last_sync = _last_simplefin_sync.get(account_id, 0)
-            time_since_last_sync = current_time - last_sync
+            time_since_last_sync = seconds_since_simplefin_sync(account_id)
 
             if time_since_last_sync < sync_interval:
                 minutes_remaining = int((sync_interval - time_since_last_sync) / 60)
@@ -92,40 +305,95 @@ def should_sync_simplefin(account_id):
         print(f"Error checking sync schedule: {e}")
         # Fall back to interval-based sync on error
         sync_interval = get_simplefin_sync_interval()
-        current_time = time.time()
-        last_sync = _last_simplefin_sync.get(account_id, 0)
-        time_since_last_sync = current_time - last_sync
+        time_since_last_sync = seconds_since_simplefin_sync(account_id)
 
         if time_since_last_sync >= sync_interval:
             return True, "interval elapsed (fallback)"
 
         return False, "error, using interval fallback"
 
+def seconds_since_simplefin_sync(account_id):
+    """Seconds since an account last synced (monotonic, so wall-clock jumps can't re-trigger a sync)"""
+    last_sync = _last_simplefin_sync.get(account_id)
+    return time.monotonic() - last_sync if last_sync is not None else float("inf")
+
+def claim_simplefin_sync(account_id, force=False):
+    """Check if an account is due and, if so, claim it for this caller.
+
+    The schedule is evaluated (which reads the database) outside the lock; the claim itself is a locked
+    check-and-set that fails if another thread synced the account meanwhile or is syncing it now, so an
+    account is never synced (and money never moved) twice at once. force=True skips the schedule (manual
+    sync) but still respects a sync in progress. Returns (should_sync, reason, previous_timestamp) - end
+    the claim with mark_simplefin_synced, or release_simplefin_sync(previous) if the sync doesn't happen.
+    """
+    previous = _last_simplefin_sync.get(account_id)
+    should_sync, reason = (True, "manual sync") if force else should_sync_simplefin(account_id)
+    with _simplefin_lock:
+        if account_id in _simplefin_syncing:
+            return False, "sync already in progress", previous
+        if _last_simplefin_sync.get(account_id) != previous:
+            return False, "synced by another checker", previous
+        if should_sync:
+            _last_simplefin_sync[account_id] = time.monotonic()
+            _simplefin_syncing.add(account_id)
+        return should_sync, reason, previous
+
+def release_simplefin_sync(account_id, previous):
+    """Undo a claim_simplefin_sync so the account is retried on the next check"""
+    with _simplefin_lock:
+        _simplefin_syncing.discard(account_id)
+        if previous is None:
+            _last_simplefin_sync.pop(account_id, None)
+        else:
+            _last_simplefin_sync[account_id] = previous
+
+def mark_simplefin_synced(account_id):
+    """Record that an account was just synced (ending any claim on it)"""
+    with _simplefin_lock:
+        _last_simplefin_sync[account_id] = time.monotonic()
+        _simplefin_syncing.discard(account_id)
+
 # --- CACHING SYSTEM ---
 class SimpleCache:
     def __init__(self, ttl_seconds=300):
         self.store = {}
         self.ttl = ttl_seconds
+        self._lock = threading.Lock()  # Sync workers read and clear the cache concurrently
 
     def get(self, key):
-        if key in self.store:
-            timestamp, data = self.store[key]
-            if time.time() - timestamp < self.ttl:
+        with self._lock:
+            entry = self.store.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if time.time() < expires_at:
                 return data
-            else:
-                del self.store[key]  # Expired
-        return None
+            self.store.pop(key, None)  # Expired
+            return None
 
-    def set(self, key, data):
-        self.store[key] = (time.time(), data)
+    def set(self, key, data, ttl=None):
+        """Store data, optionally with a shorter/longer TTL than the cache default"""
+        with self._lock:
+            self.store[key] = (time.time() + (ttl if ttl is not None else self.ttl), data)
 
     def clear(self):
-        self.store = {}
+        with self._lock:
+            self.store = {}
+
+    def delete_prefix(self, *prefixes):
+        """Drop only the entries cached under the given key prefixes (e.g. "goals" or "simplefin:accounts")"""
+        with self._lock:
+            for key in list(self.store):
+                if any(key == prefix or key.startswith(prefix + ":") for prefix in prefixes):
+                    self.store.pop(key, None)
 
 cache = SimpleCache(ttl_seconds=300)
 
-def cached(key_prefix):
-    """Decorator to cache function results. Supports force_refresh=True kwarg."""
+# Cached data that goes stale when a credit card sync changes pocket balances
+POCKET_CACHE_PREFIXES = ("goals", "subaccounts", "financial_data")
+
+def cached(key_prefix, ttl=None):
+    """Decorator to cache function results (for ttl seconds, default the cache TTL). Supports force_refresh=True kwarg."""
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
@@ -143,7 +411,7 @@ def cached(key_prefix):
             result = func(*args, **kwargs)
             
             if isinstance(result, dict) and "error" not in result:
-                cache.set(cache_key, result)
+                cache.set(cache_key, result, ttl=ttl)
             return result
         return wrapper
     return decorator
@@ -151,7 +419,9 @@ def cached(key_prefix):
 
 # 1. UPDATE DATABASE SCHEMA
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
+    global _schema_ready
+    conn = _connect()
+    conn.execute("PRAGMA journal_mode=WAL")  # Persistent on the file, so every later connection uses WAL
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS history (date TEXT PRIMARY KEY, balance REAL)''')
     c.execute('''CREATE TABLE IF NOT EXISTS groups (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE)''')
@@ -327,6 +597,10 @@ def init_db():
         is_pending INTEGER,
         created_at TEXT DEFAULT CURRENT_TIMESTAMP
     )''')
+    # Match the transaction list's ORDER BY so it walks the index and stops at LIMIT instead of sorting;
+    # the account_id prefix also serves the seen-ID lookups during sync
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cctx_account_date ON credit_card_transactions(account_id, date DESC, created_at DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cctx_date ON credit_card_transactions(date DESC, created_at DESC)")
 
     # Onboarding flow tables
     c.execute('''CREATE TABLE IF NOT EXISTS onboarding_config (
@@ -358,6 +632,7 @@ def init_db():
     migrate_tokens_to_db(c, conn)
 
     conn.close()
+    _schema_ready = True
 
 def migrate_tokens_to_db(cursor, connection):
     """Auto-migrate env vars to database on first run"""
@@ -377,7 +652,7 @@ def migrate_tokens_to_db(cursor, connection):
     has_lunchflow = cursor.fetchone()
 
     if not has_lunchflow:
-        api_key = os.environ.get("LUNCHFLOW_API_KEY")
+        api_key = LUNCHFLOW_API_KEY
         if api_key and api_key != "none":
             cursor.execute("INSERT INTO lunchflow_config (api_key) VALUES (?)", (api_key,))
             print("✅ Migrated LUNCHFLOW_API_KEY from env vars to database")
@@ -385,7 +660,7 @@ def migrate_tokens_to_db(cursor, connection):
     connection.commit()
 
 def log_balance(balance):
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     today = datetime.now().strftime("%Y-%m-%d")
     try:
@@ -397,7 +672,7 @@ def log_balance(balance):
         conn.close()
 
 def get_history():
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     c.execute("SELECT date, balance FROM history ORDER BY date ASC")
     data = c.fetchall()
@@ -410,7 +685,7 @@ def get_history():
 # --- TOKEN RETRIEVAL HELPERS ---
 def get_crew_bearer_token():
     """Get Crew bearer token (database first, then env var fallback)"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     c.execute("SELECT bearer_token FROM crew_config WHERE is_valid = 1 LIMIT 1")
     row = c.fetchone()
@@ -424,7 +699,7 @@ def get_crew_bearer_token():
 
 def get_lunchflow_api_key():
     """Get LunchFlow API key (database first, then env var fallback)"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     c.execute("SELECT api_key FROM lunchflow_config WHERE is_valid = 1 LIMIT 1")
     row = c.fetchone()
@@ -434,11 +709,19 @@ def get_lunchflow_api_key():
         return row[0]
 
     # Fallback to env var
-    env_key = os.environ.get("LUNCHFLOW_API_KEY")
-    return env_key if env_key and env_key != "none" else None
+    return LUNCHFLOW_API_KEY if LUNCHFLOW_API_KEY and LUNCHFLOW_API_KEY != "none" else None
 
 # --- API HELPERS ---
 def get_crew_headers():
+    """Crew request headers; within a request the token lookup is done once and reused (flask.g)"""
+    if has_request_context():
+        headers = g.get("crew_headers")
+        if headers is None:
+            headers = g.crew_headers = build_crew_headers()
+        return headers
+    return build_crew_headers()
+
+def build_crew_headers():
     bearer_token = get_crew_bearer_token()
 
 
@@ -746,7 +1029,7 @@ def get_goals_data():
         data = response.json()
         
         # 2. Fetch Groups and Links from DB
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         
         c.execute("SELECT id, name FROM groups")
@@ -851,19 +1134,134 @@ def get_subaccounts_list():
             for sub in account.get("subaccounts", []):
                 balance = sub.get("overallBalance", 0) / 100.0
                 subs.append({"id": sub.get("id"), "name": sub.get("name"), "balance": balance})
-        return {"subaccounts": subs}
+        # Name -> ID index so lookups like "Checking" are a dict probe rather than a scan. The first
+        # subaccount with a name wins, like the scan did - a user pocket also named "Checking" comes later
+        by_name = {}
+        for sub in subs:
+            by_name.setdefault(sub["name"], sub["id"])
+        return {"subaccounts": subs, "by_name": by_name}
     except Exception as e:
         return {"error": str(e)}
 
+def get_checking_subaccount_id():
+    """Look up the Checking subaccount ID (cached for 10 min, dropped on cache.clear()); None if unavailable"""
+    checking_id = cache.get("checking_subaccount_id")
+    if checking_id is None:
+        all_subs = get_subaccounts_list()
+        if "error" in all_subs:
+            return None
+        checking_id = all_subs.get("by_name", {}).get("Checking")
+        if checking_id:
+            cache.set("checking_subaccount_id", checking_id, ttl=600)
+    return checking_id
+
+def graphql_id_body_template(operation_name, query):
+    """Pre-serialize a GraphQL request body whose only variable is $id, as (prefix, suffix) bytes"""
+    prefix = b'{"operationName":' + json_bytes(operation_name) + b',"query":' + json_bytes(query) + b',"variables":{"id":'
+    return prefix, b"}}"
+
+# Only the pocket ID changes between these requests, so the rest of the body is serialized once
+GET_SUBACCOUNT_BODY = graphql_id_body_template("GetSubaccount", GET_SUBACCOUNT_QUERY)
+GET_SUBACCOUNT_WITH_CHECKING_BODY = graphql_id_body_template("GetSubaccountWithChecking", GET_SUBACCOUNT_WITH_CHECKING_QUERY)
+
+def graphql_id_body(template, node_id):
+    """Fill a graphql_id_body_template with an ID (JSON-encoded, so quotes/backslashes stay escaped)"""
+    prefix, suffix = template
+    return prefix + json_bytes(node_id) + suffix
+
+def get_pocket_balance_cents_and_checking_id(pocket_id, headers):
+    """Fetch a pocket's balance (integer cents) and the Checking subaccount ID in one Crew round-trip.
+
+    When the Checking ID is already cached this is just get_subaccount_balance_cents(); otherwise the
+    subaccount list is requested in the same GraphQL query. The ID is None if it can't be found.
+    """
+    checking_id = cache.get("checking_subaccount_id")
+    if checking_id is not None:
+        return get_subaccount_balance_cents(pocket_id, headers), checking_id
+
+    response = _crew_session.post(URL, headers=headers, data=graphql_id_body(GET_SUBACCOUNT_WITH_CHECKING_BODY, pocket_id))
+    data = parse_json(response).get("data") or {}
+    balance_cents = int((data.get("node") or {}).get("overallBalance") or 0)
+
+    for account in (data.get("currentUser") or {}).get("accounts", []):
+        for sub in account.get("subaccounts", []):
+            if sub.get("name") == "Checking":
+                checking_id = sub.get("id")
+                cache.set("checking_subaccount_id", checking_id, ttl=600)
+                return balance_cents, checking_id
+    return balance_cents, None
+
+def get_subaccount_balance_cents(pocket_id, headers):
+    """Fetch a single pocket's overall balance in integer cents (0 if it can't be read)"""
+    response = _crew_session.post(URL, headers=headers, data=graphql_id_body(GET_SUBACCOUNT_BODY, pocket_id))
+    data = parse_json(response).get("data")
+    if not data or not data.get("node"):
+        return 0
+    return int(data["node"]["overallBalance"] or 0)  # Crew reports balances in cents already
+
+def batched(items, size):
+    """Yield consecutive slices of at most `size` items (itertools.batched needs Python 3.12)"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+GRAPHQL_ALIAS_BATCH_SIZE = 50  # Aliased node() selections per query, to stay under Crew's complexity limits
+
+@functools.lru_cache(maxsize=None)
+def get_subaccounts_query(count):
+    """Build (once per batch size) the aliased GetSubaccounts query selecting node(id: $idN) as pN"""
+    params = " ".join(f"$id{i}: ID!" for i in range(count))
+    selections = " ".join(f"p{i}: node(id: $id{i}) {{ ... on Subaccount {{ id overallBalance }} }}" for i in range(count))
+    return f"query GetSubaccounts({params}) {{ {selections} }}"
+
+def get_subaccount_balances_cents(pocket_ids, headers):
+    """Fetch many pockets' overall balances (integer cents) with aliased node() selections.
+
+    Returns {pocket_id: cents} for the pockets whose balance was actually returned. Pockets missing from the
+    response (batch rejected, e.g. by a complexity limit, or an aliased field that errored) are left out, so
+    callers can fall back to a per-pocket lookup rather than act on an unknown balance.
+    """
+    balances = {}
+    for batch in batched(pocket_ids, GRAPHQL_ALIAS_BATCH_SIZE):
+        variables = {f"id{i}": pocket_id for i, pocket_id in enumerate(batch)}
+        response = _crew_session.post(URL, headers=headers, json={"operationName": "GetSubaccounts", "variables": variables, "query": get_subaccounts_query(len(batch))})
+        data = parse_json(response).get("data") or {}
+        for i, pocket_id in enumerate(batch):
+            node = data.get(f"p{i}")
+            if node and node.get("overallBalance") is not None:
+                balances[pocket_id] = int(node["overallBalance"])
+    return balances
+
+def to_cents(amount):
+    """Convert a dollar amount (string or number) to integer cents without float rounding.
+
+    Raises InvalidOperation for anything that isn't a finite number (including "NaN" and "Infinity").
+    """
+    value = Decimal(str(amount))
+    if not value.is_finite():
+        raise InvalidOperation(f"non-finite amount: {amount}")
+    return int((value * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+def format_cents(cents):
+    """Format non-negative integer cents as a dollar string (e.g. 1999 -> "19.99")"""
+    return f"{cents // 100}.{cents % 100:02d}"
+
 def move_money(from_id, to_id, amount, note=""):
+    """Transfer a dollar amount (string or number, e.g. from a request body) between accounts"""
+    try:
+        amount_cents = to_cents(amount)
+    except (InvalidOperation, TypeError, ValueError):
+        return {"error": f"Invalid amount: {amount}"}
+    return move_money_cents(from_id, to_id, amount_cents, note)
+
+def move_money_cents(from_id, to_id, amount_cents, note=""):
+    """Transfer integer cents between accounts - internal callers already hold cents, so no float/string round-trip"""
     try:
         headers = get_crew_headers()
         if not headers: return {"error": "Credentials not found"}
         query_string = """ mutation InitiateTransferScottie($input: InitiateTransferInput!) { initiateTransfer(input: $input) { result { id __typename } __typename } } """
-        amount_cents = int(round(float(amount) * 100))
         variables = {"input": {"amount": amount_cents, "accountFromId": from_id, "accountToId": to_id, "note": note or "Transfer"}}
-        response = requests.post(URL, headers=headers, json={"operationName": "InitiateTransferScottie", "variables": variables, "query": query_string})
-        data = response.json()
+        response = _crew_session.post(URL, headers=headers, json={"operationName": "InitiateTransferScottie", "variables": variables, "query": query_string})
+        data = parse_json(response)
         if 'errors' in data: return {"error": data['errors'][0]['message']}
         print("🧹 Clearing Cache after transaction...")
         cache.clear()
@@ -871,6 +1269,62 @@ def move_money(from_id, to_id, amount, note=""):
     except Exception as e:
         return {"error": str(e)}
 
+TRANSFER_BATCH_SIZE = 25  # Aliased initiateTransfer mutations per request
+
+@functools.lru_cache(maxsize=None)
+def initiate_transfers_query(count):
+    """Build (once per batch size) the aliased InitiateTransfers mutation running initiateTransfer(input: $inputN) as tN"""
+    params = " ".join(f"$input{i}: InitiateTransferInput!" for i in range(count))
+    selections = " ".join(f"t{i}: initiateTransfer(input: $input{i}) {{ result {{ id }} }}" for i in range(count))
+    return f"mutation InitiateTransfers({params}) {{ {selections} }}"
+
+def move_money_batch(transfers, headers):
+    """Run (from_id, to_id, amount_cents, note) transfers as aliased mutations, TRANSFER_BATCH_SIZE per request.
+
+    Returns one result per transfer: True if it went through, False if it failed (or its outcome is unknown),
+    None if Crew rejected the whole request before running anything - only those are safe to retry.
+    """
+    results = []
+    for batch in batched(transfers, TRANSFER_BATCH_SIZE):
+        variables = {
+            f"input{i}": {"amount": amount_cents, "accountFromId": from_id, "accountToId": to_id, "note": note or "Transfer"}
+            for i, (from_id, to_id, amount_cents, note) in enumerate(batch)
+        }
+        try:
+            response = _crew_session.post(URL, headers=headers, json={"operationName": "InitiateTransfers", "variables": variables, "query": initiate_transfers_query(len(batch))})
+            data = parse_json(response).get("data")
+        except Exception as e:
+            logger.warning("Error sending transfer batch: %s", e)
+            results.extend([False] * len(batch))
+            continue
+        if data is None:
+            results.extend([None] * len(batch))  # Validation/parse error: no mutation ran
+        else:
+            results.extend(bool(data.get(f"t{i}")) for i in range(len(batch)))
+
+    if any(results):
+        print("🧹 Clearing Cache after transaction...")
+        cache.clear()
+    return results
+
+def release_pocket(pocket_id, current_cents, checking_subaccount_id, headers, note):
+    """Return a pocket's funds (integer cents, fetched if None) to Checking and queue the pocket for deletion.
+
+    Raises instead of queueing when the balance can't be read or the funds can't be returned, so a pocket
+    that may still hold money is never deleted.
+    """
+    if current_cents is None:
+        current_cents = get_subaccount_balances_cents([pocket_id], headers).get(pocket_id)
+        if current_cents is None:
+            raise RuntimeError(f"could not read the balance of pocket {pocket_id}")
+    if current_cents > 1:
+        if not checking_subaccount_id:
+            raise RuntimeError("Checking subaccount not found, keeping the funded pocket")
+        result = move_money_cents(pocket_id, checking_subaccount_id, current_cents, note)
+        if "error" in result:
+            raise RuntimeError(f"returning funds failed, keeping the pocket: {result['error']}")
+    _pocket_deletions.put(pocket_id)
+
 @cached("family")
 def get_family_data():
     try:
@@ -1070,13 +1524,13 @@ def delete_subaccount_action(sub_id):
         
         variables = {"id": sub_id}
 
-        response = requests.post(URL, headers=headers, json={
+        response = _crew_session.post(URL, headers=headers, json={
             "operationName": "DeleteSubaccount",
             "variables": variables,
             "query": query_string
         })
 
-        data = response.json()
+        data = parse_json(response)
         
         if 'errors' in data:
             return {"error": data['errors'][0]['message']}
@@ -1084,7 +1538,7 @@ def delete_subaccount_action(sub_id):
         # --- NEW: Clean up local DB ---
         # This ensures the deleted pocket is removed from your local grouping table
         try:
-            conn = sqlite3.connect(DB_FILE)
+            conn = _db()
             c = conn.cursor()
             c.execute("DELETE FROM pocket_groups WHERE pocket_id = ?", (sub_id,))
             conn.commit()
@@ -1192,18 +1646,7 @@ def set_spend_pocket_action(user_id, pocket_id):
     try:
         # --- FIX START: Resolve "Checking" to a real ID ---
         if pocket_id == "Checking":
-            # Fetch the list of subaccounts to find the ID for "Checking"
-            all_subs = get_subaccounts_list()
-            
-            if "error" in all_subs:
-                return {"error": "Could not resolve Checking ID"}
-                
-            found_id = None
-            for sub in all_subs.get("subaccounts", []):
-                if sub["name"] == "Checking":
-                    found_id = sub["id"]
-                    break
-            
+            found_id = get_checking_subaccount_id()
             if found_id:
                 pocket_id = found_id
             else:
@@ -1363,7 +1806,7 @@ def create_bill_action(name, amount, frequency_key, day_of_month, match_string=N
 @app.route('/')
 def index():
     # Check if onboarding is complete
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     c.execute("SELECT is_completed FROM onboarding_config LIMIT 1")
     row = c.fetchone()
@@ -1392,7 +1835,7 @@ def serve_sw():
 @app.route('/api/onboarding/status')
 def api_onboarding_status():
     """Check if onboarding is complete"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     c.execute("SELECT is_completed FROM onboarding_config LIMIT 1")
     row = c.fetchone()
@@ -1443,7 +1886,7 @@ def api_save_crew_token():
         return jsonify({"success": False, "error": f"Token validation failed: {str(e)}"}), 500
 
     # Save to database
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
 
     c.execute("SELECT id FROM crew_config LIMIT 1")
@@ -1457,6 +1900,7 @@ def api_save_crew_token():
 
     conn.commit()
     conn.close()
+    g.pop("crew_headers", None)  # Headers memoized earlier in this request carry the old token
 
     return jsonify({"success": True})
 
@@ -1467,7 +1911,7 @@ def api_complete_onboarding():
     if not get_crew_bearer_token():
         return jsonify({"success": False, "error": "No Crew token configured"}), 400
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
 
     c.execute("SELECT id FROM onboarding_config LIMIT 1")
@@ -1505,7 +1949,7 @@ def api_move_pocket():
     target_group_id = data.get('targetGroupId') # Can be None (Ungrouped)
     ordered_ids = data.get('orderedPocketIds', [])
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     try:
         # Loop through the list provided by frontend and update both Group and Order
@@ -1534,7 +1978,7 @@ def api_manage_group():
     name = data.get('name')
     pocket_ids = data.get('pockets', []) # List of pocket IDs to assign
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     try:
         if not group_id:
@@ -1568,7 +2012,7 @@ def api_delete_group():
     data = request.json
     group_id = data.get('id')
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     try:
         # Delete Group
@@ -1590,7 +2034,7 @@ def api_assign_group():
     pocket_id = data.get('pocketId')
     group_name = data.get('groupName') # If empty string, we treat as ungroup
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
     try:
         if not group_name or group_name.strip() == "":
@@ -1643,7 +2087,7 @@ def api_transactions():
 
     # Get credit card transactions
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         c.execute("""SELECT transaction_id, amount, date, merchant, description, is_pending, created_at
                      FROM credit_card_transactions
@@ -1743,7 +2187,7 @@ def api_create_pocket():
         group_id = data.get('groupId')
         
         # Assign to group in database
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         try:
             c.execute("INSERT OR REPLACE INTO pocket_links (pocket_id, group_id, sort_order) VALUES (?, ?, ?)", 
@@ -1818,7 +2262,7 @@ def api_save_lunchflow_key():
         return jsonify({"success": False, "error": f"Validation failed: {str(e)}"}), 500
 
     # Save to database
-    conn = sqlite3.connect(DB_FILE)
+    conn = _db()
     c = conn.cursor()
 
     c.execute("SELECT id FROM lunchflow_config LIMIT 1")
@@ -1876,7 +2320,7 @@ def api_set_credit_card():
         return jsonify({"error": "accountId is required"}), 400
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
 
         # Store the account info with provider='lunchflow'
@@ -1927,9 +2371,12 @@ def api_create_pocket_with_balance():
     
     if not account_id:
         return jsonify({"error": "accountId is required"}), 400
+
+    # Without a key the pocket is still created, just with a 0 balance (syncBalance can't apply)
+    api_key = get_lunchflow_api_key()
     
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         
         # Get account name
@@ -1944,7 +2391,6 @@ def api_create_pocket_with_balance():
         # Get current balance from LunchFlow (always fetch for progress bar, but only sync pocket if requested)
         initial_amount = "0"
         current_balance_value = 0
-        api_key = get_lunchflow_api_key()
         if api_key:
             try:
                 headers = {"x-api-key": api_key, "accept": "application/json"}
@@ -1980,6 +2426,7 @@ def api_create_pocket_with_balance():
         conn.close()
         
         cache.clear()
+        wake_transaction_checker()  # Pull in the new card's transactions without waiting for the next tick
         return jsonify({"success": True, "message": "Credit card pocket created", "pocketId": pocket_id, "syncedBalance": sync_balance})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1990,7 +2437,7 @@ def api_credit_card_status():
     api_key = get_lunchflow_api_key()
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
 
         # Get first account for backward compatibility
@@ -2003,10 +2450,9 @@ def api_credit_card_status():
 
         # Check if SimpleFin access URL exists and is valid, and get last sync time
         c.execute("SELECT access_url, is_valid, last_sync FROM simplefin_config LIMIT 1")
-        simplefin_url = c.fetchone()
-        has_simplefin_access_url = bool(simplefin_url and simplefin_url[0])
-        simplefin_token_invalid = bool(simplefin_url and simplefin_url[0] and simplefin_url[1] == 0)
-        last_sync = simplefin_url[2] if simplefin_url and len(simplefin_url) > 2 else None
+        access_url, is_valid, last_sync = c.fetchone() or (None, None, None)
+        has_simplefin_access_url = bool(access_url)
+        simplefin_token_invalid = bool(access_url and is_valid == 0)
 
         conn.close()
 
@@ -2027,33 +2473,32 @@ def api_credit_card_status():
 
         # Backward compatibility: populate single account fields
         if row:
-            account_id = row[0]
+            account_id, account_name, pocket_id, created_at, provider = row
             # Check if this is a real account or just a temp record from token claim
             is_temp_record = account_id == 'temp_simplefin'
 
             if not is_temp_record:
                 result["configured"] = True
                 result["accountId"] = account_id
-                result["accountName"] = row[1]
-                result["pocketId"] = row[2]
-                result["pocketCreated"] = bool(row[2])
-                result["createdAt"] = row[3]
-                result["provider"] = row[4] if len(row) > 4 else "lunchflow"
+                result["accountName"] = account_name
+                result["pocketId"] = pocket_id
+                result["pocketCreated"] = bool(pocket_id)
+                result["createdAt"] = created_at
+                result["provider"] = provider
 
         # Populate accounts array for SimpleFin
-        for sf_row in simplefin_rows:
-            account_id = sf_row[0]
+        for account_id, account_name, pocket_id, created_at, provider in simplefin_rows:
             # Skip temp records
             if account_id == 'temp_simplefin':
                 continue
 
             result["accounts"].append({
                 "accountId": account_id,
-                "accountName": sf_row[1],
-                "pocketId": sf_row[2],
-                "createdAt": sf_row[3],
-                "provider": sf_row[4],
-                "pocketCreated": bool(sf_row[2])
+                "accountName": account_name,
+                "pocketId": pocket_id,
+                "createdAt": created_at,
+                "provider": provider,
+                "pocketCreated": bool(pocket_id)
             })
 
         return jsonify(result)
@@ -2068,10 +2513,15 @@ def api_sync_balance():
     
     if not account_id:
         return jsonify({"error": "accountId is required"}), 400
+
+    # Check the key (lunchflow_config, then the env var) before looking up the pocket config
+    api_key = get_lunchflow_api_key()
+    if not api_key:
+        return jsonify({"error": "LunchFlow API key not configured"}), 400
     
     try:
         # Get pocket_id from database
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         c.execute("SELECT pocket_id FROM credit_card_config WHERE account_id = ?", (account_id,))
         row = c.fetchone()
@@ -2083,10 +2533,6 @@ def api_sync_balance():
         pocket_id = row[0]
 
         # Get balance from LunchFlow
-        api_key = get_lunchflow_api_key()
-        if not api_key:
-            return jsonify({"error": "LunchFlow API key not configured"}), 400
-        
         headers = {"x-api-key": api_key, "accept": "application/json"}
         response = requests.get(f"https://www.lunchflow.app/api/v1/accounts/{account_id}/balance", headers=headers, timeout=30)
         
@@ -2099,7 +2545,7 @@ def api_sync_balance():
         target_balance = abs(balance_amount)
 
         # Save current balance to database
-        conn = sqlite3.connect(DB_FILE)
+        conn = _db()
         c = conn.cursor()
         c.execute("UPDATE credit_card_config SET current_balance = ? WHERE account_id = ?", (target_balance, account_id))
         conn.commit()
@@ -2110,51 +2556,27 @@ def api_sync_balance():
         if not headers_crew:
             return jsonify({"error": "Crew credentials not found"}), 400
         
-        query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-        response_crew = requests.post(URL, headers=headers_crew, json={
-            "operationName": "GetSubaccount",
-            "variables": {"id": pocket_id},
-            "query": query_string
-        })
-        
-        crew_data = response_crew.json()
-        current_balance = 0
-        try:
-            current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-        except:
-            pass
-        
-        # Calculate difference
-        difference = target_balance - current_balance
-        
-        # Get Checking subaccount ID (not Account ID)
-        all_subs = get_subaccounts_list()
-        if "error" in all_subs:
-            return jsonify({"error": "Could not get subaccounts list"}), 400
-        
-        checking_subaccount_id = None
-        for sub in all_subs.get("subaccounts", []):
-            if sub["name"] == "Checking":
-                checking_subaccount_id = sub["id"]
-                break
+        current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
         
+        # Calculate difference in exact cents
+        difference_cents = to_cents(target_balance) - current_cents
         if not checking_subaccount_id:
             return jsonify({"error": "Could not find Checking subaccount"}), 400
         
         # Transfer money to/from pocket
-        if abs(difference) > 0.01:  # Only transfer if difference is significant
-            if difference > 0:
+        if abs(difference_cents) > 1:  # Only transfer if difference is significant
+            if difference_cents > 0:
                 # Need to move money from Checking to Pocket
-                result = move_money(checking_subaccount_id, pocket_id, str(difference), f"Sync credit card balance")
+                result = move_money_cents(checking_subaccount_id, pocket_id, difference_cents, f"Sync credit card balance")
             else:
                 # Need to move money from Pocket to Checking
-                result = move_money(pocket_id, checking_subaccount_id, str(abs(difference)), f"Sync credit card balance")
+                result = move_money_cents(pocket_id, checking_subaccount_id, -difference_cents, f"Sync credit card balance")
             
             if "error" in result:
                 return jsonify({"error": f"Failed to sync balance: {result['error']}"}), 500
         
         cache.clear()
-        return jsonify({"success": True, "message": "Balance synced", "targetBalance": target_balance, "previousBalance": current_balance})
+        return jsonify({"success": True, "message": "Balance synced", "targetBalance": target_balance, "previousBalance": current_cents / 100})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -2162,55 +2584,30 @@ def api_sync_balance():
 def api_change_account():
     """Delete the credit card pocket, return money to safe-to-spend, and clear config"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        
-        # Get current config - find any configured account with a pocket
-        c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE pocket_id IS NOT NULL LIMIT 1")
-        row = c.fetchone()
-        
-        if not row:
-            # Check if there's any config at all (even without pocket)
-            c.execute("SELECT account_id, pocket_id FROM credit_card_config LIMIT 1")
+        with db_read() as c:
+            # Get current config - find any configured account with a pocket
+            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE pocket_id IS NOT NULL LIMIT 1")
             row = c.fetchone()
+
             if not row:
-                conn.close()
-                return jsonify({"error": "No credit card account configured"}), 400
-            # Get account_id even if pocket_id is NULL
-            account_id = row[0]
-            pocket_id = row[1] if len(row) > 1 else None
-        else:
-            account_id, pocket_id = row[0], row[1]
+                # Check if there's any config at all (even without pocket)
+                c.execute("SELECT account_id, pocket_id FROM credit_card_config LIMIT 1")
+                row = c.fetchone()
+
+        if not row:
+            return jsonify({"error": "No credit card account configured"}), 400
+        # pocket_id may be NULL if only the fallback query matched
+        account_id, pocket_id = row
         
         # Get current pocket balance and return it to Checking
         headers_crew = get_crew_headers()
         if headers_crew and pocket_id:
             try:
-                query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                response_crew = requests.post(URL, headers=headers_crew, json={
-                    "operationName": "GetSubaccount",
-                    "variables": {"id": pocket_id},
-                    "query": query_string
-                })
-                
-                crew_data = response_crew.json()
-                current_balance = 0
-                try:
-                    current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                except:
-                    pass
+                current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
                 
                 # Return money to Checking if there's a balance
-                all_subs = get_subaccounts_list()
-                if "error" not in all_subs:
-                    checking_subaccount_id = None
-                    for sub in all_subs.get("subaccounts", []):
-                        if sub["name"] == "Checking":
-                            checking_subaccount_id = sub["id"]
-                            break
-                    
-                    if checking_subaccount_id and current_balance > 0.01:
-                        move_money(pocket_id, checking_subaccount_id, str(current_balance), "Returning credit card pocket funds to Safe-to-Spend")
+                if checking_subaccount_id and current_cents > 1:
+                    move_money_cents(pocket_id, checking_subaccount_id, current_cents, "Returning credit card pocket funds to Safe-to-Spend")
                 
                 # Delete the pocket
                 delete_subaccount_action(pocket_id)
@@ -2219,10 +2616,10 @@ def api_change_account():
         
         # Delete ALL config rows for this account and transaction history (user will select a new account)
         # Delete all rows regardless of pocket_id status to ensure clean state
-        c.execute("DELETE FROM credit_card_config WHERE account_id = ?", (account_id,))
-        c.execute("DELETE FROM credit_card_transactions WHERE account_id = ?", (account_id,))
-        conn.commit()
-        conn.close()
+        # Both deletes share one transaction (one commit) and roll back together on failure
+        with db_write() as c:
+            c.execute("DELETE FROM credit_card_config WHERE account_id = ?", (account_id,))
+            c.execute(SQL_DELETE_ACCOUNT_TRANSACTIONS, (account_id,))
         
         cache.clear()
         return jsonify({"success": True, "message": "Account changed. Pocket deleted and funds returned to Safe-to-Spend."})
@@ -2233,59 +2630,35 @@ def api_change_account():
 def api_stop_tracking():
     """Delete the credit card pocket, return money to safe-to-spend, and delete all config"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        
         # Get current config
-        c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE pocket_id IS NOT NULL LIMIT 1")
-        row = c.fetchone()
+        with db_read() as c:
+            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE pocket_id IS NOT NULL LIMIT 1")
+            row = c.fetchone()
         
         if not row:
-            conn.close()
             return jsonify({"error": "No credit card account configured"}), 400
         
-        account_id, pocket_id = row[0], row[1]
+        account_id, pocket_id = row
         
         # Get current pocket balance and return it to Checking
         headers_crew = get_crew_headers()
         if headers_crew and pocket_id:
             try:
-                query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                response_crew = requests.post(URL, headers=headers_crew, json={
-                    "operationName": "GetSubaccount",
-                    "variables": {"id": pocket_id},
-                    "query": query_string
-                })
-                
-                crew_data = response_crew.json()
-                current_balance = 0
-                try:
-                    current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                except:
-                    pass
+                current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
                 
                 # Return money to Checking if there's a balance
-                all_subs = get_subaccounts_list()
-                if "error" not in all_subs:
-                    checking_subaccount_id = None
-                    for sub in all_subs.get("subaccounts", []):
-                        if sub["name"] == "Checking":
-                            checking_subaccount_id = sub["id"]
-                            break
-                    
-                    if checking_subaccount_id and current_balance > 0.01:
-                        move_money(pocket_id, checking_subaccount_id, str(current_balance), "Returning credit card pocket funds to Safe-to-Spend")
+                if checking_subaccount_id and current_cents > 1:
+                    move_money_cents(pocket_id, checking_subaccount_id, current_cents, "Returning credit card pocket funds to Safe-to-Spend")
                 
                 # Delete the pocket
                 delete_subaccount_action(pocket_id)
             except Exception as e:
                 print(f"Warning: Error deleting pocket: {e}")
         
-        # Delete all credit card config and transactions
-        c.execute("DELETE FROM credit_card_config WHERE account_id = ?", (account_id,))
-        c.execute("DELETE FROM credit_card_transactions WHERE account_id = ?", (account_id,))
-        conn.commit()
-        conn.close()
+        # Delete all credit card config and transactions in a single transaction
+        with db_write() as c:
+            c.execute("DELETE FROM credit_card_config WHERE account_id = ?", (account_id,))
+            c.execute(SQL_DELETE_ACCOUNT_TRANSACTIONS, (account_id,))
         
         cache.clear()
         return jsonify({"success": True, "message": "Tracking stopped. Pocket deleted and funds returned to Safe-to-Spend."})
@@ -2293,10 +2666,31 @@ def api_stop_tracking():
         return jsonify({"error": str(e)}), 500
 
 # --- CREDIT CARD TRANSACTION SYNCING ---
+def has_lunchflow_pockets():
+    """Check if any LunchFlow card has a pocket to sync (cached for 60s, dropped on cache.clear())"""
+    has_pockets = cache.get("has_lunchflow_pockets")
+    if has_pockets is None:
+        conn = _db()
+        c = conn.cursor()
+        c.execute("SELECT EXISTS(SELECT 1 FROM credit_card_config WHERE provider='lunchflow' AND pocket_id IS NOT NULL)")
+        has_pockets = bool(c.fetchone()[0])
+        conn.close()
+        cache.set("has_lunchflow_pockets", has_pockets, ttl=60)
+    return has_pockets
+
 def check_credit_card_transactions():
     """Check for new credit card transactions and update balance (supports both LunchFlow and SimpleFin)"""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        # Cheap precheck: LunchFlow cards are checked every tick, but SimpleFin accounts are rate limited.
+        # If every SimpleFin account synced too recently to be due, there is nothing to do - skip the DB work.
+        now = time.monotonic()
+        with _simplefin_lock:
+            all_recent = bool(_last_simplefin_sync) and all(
+                now - last_sync < _simplefin_min_resync for last_sync in _last_simplefin_sync.values())
+        if all_recent and not has_lunchflow_pockets():
+            return
+
+        conn = _db()
         c = conn.cursor()
 
         # Get ALL credit card account configs with provider info (no LIMIT 1)
@@ -2315,33 +2709,39 @@ def check_credit_card_transactions():
         # Get SimpleFin access URL and last sync time
         c.execute("SELECT access_url, last_sync FROM simplefin_config LIMIT 1")
         url_row = c.fetchone()
-        simplefin_access_url = url_row[0] if url_row and url_row[0] else None
-        db_last_sync = url_row[1] if url_row and len(url_row) > 1 else None
+        simplefin_access_url, db_last_sync = url_row or (None, None)
+        simplefin_access_url = simplefin_access_url or None
+
+        simplefin_ids = {row[0] for row in rows if row[2] == 'simplefin'}
+        with _simplefin_lock:
+            # Initialize in-memory rate limiter from database if not already set
+            if db_last_sync and not _last_simplefin_sync:
+                # Parse ISO timestamp and convert the wall-clock age to a monotonic timestamp
+                from datetime import datetime
+                try:
+                    last_sync_dt = datetime.fromisoformat(db_last_sync.replace('Z', '+00:00'))
+                    age = max(0.0, time.time() - last_sync_dt.timestamp())
+                    # Pre-populate for all SimpleFin accounts with the global last sync
+                    for account_id in simplefin_ids:
+                        _last_simplefin_sync[account_id] = time.monotonic() - age
+                    print(f"📊 Initialized SimpleFin rate limiter from database: last sync was {db_last_sync}", flush=True)
+                except Exception as e:
+                    print(f"⚠️ Failed to parse last_sync from database: {e}", flush=True)
 
-        # Initialize in-memory rate limiter from database if not already set
-        global _last_simplefin_sync
-        if db_last_sync and not _last_simplefin_sync:
-            # Parse ISO timestamp and convert to Unix timestamp
-            from datetime import datetime
-            try:
-                last_sync_dt = datetime.fromisoformat(db_last_sync.replace('Z', '+00:00'))
-                last_sync_timestamp = last_sync_dt.timestamp()
-                # Pre-populate for all SimpleFin accounts with the global last sync
-                for row in rows:
-                    if row[2] == 'simplefin':  # provider
-                        _last_simplefin_sync[row[0]] = last_sync_timestamp
-                print(f"📊 Initialized SimpleFin rate limiter from database: last sync was {db_last_sync}", flush=True)
-            except Exception as e:
-                print(f"⚠️ Failed to parse last_sync from database: {e}", flush=True)
+            # Forget accounts that are no longer tracked so the dict stays bounded
+            for stale_id in set(_last_simplefin_sync) - simplefin_ids:
+                del _last_simplefin_sync[stale_id]
 
-        # Determine which SimpleFin accounts are due for sync
+        # Determine which SimpleFin accounts are due for sync (claiming them so no other thread syncs them too)
         simplefin_to_sync = []
+        claimed = {}  # account_id -> previous sync timestamp, to release the claim if the fetch fails
         if simplefin_access_url:
             for row in rows:
                 if row[2] == 'simplefin':
-                    should_sync, reason = should_sync_simplefin(row[0])
+                    should_sync, reason, previous = claim_simplefin_sync(row[0])
                     if should_sync:
                         simplefin_to_sync.append((row[0], row[1], reason))
+                        claimed[row[0]] = previous
                     else:
                         print(f"⏰ SimpleFin sync skipped for account {row[0]} ({reason})", flush=True)
         else:
@@ -2366,41 +2766,44 @@ def check_credit_card_transactions():
             for acc_id, _, _ in simplefin_to_sync:
                 params.append(('account', acc_id))
             print(f"📡 Batch fetching SimpleFin data for {len(simplefin_to_sync)} account(s) in one request", flush=True)
-            response = requests.get(f"{simplefin_access_url}/accounts", params=params, timeout=60)
-            if response.status_code == 200:
-                simplefin_data = response.json()
-                print(f"✅ SimpleFin batch fetch returned {len(simplefin_data.get('accounts', []))} accounts", flush=True)
-            else:
-                print(f"❌ SimpleFin API error: {response.status_code} - {response.text}", flush=True)
-                if response.status_code == 403:
-                    print("🚫 SimpleFin token has been revoked or is invalid", flush=True)
-                    c.execute("UPDATE simplefin_config SET is_valid = 0")
-                    conn.commit()
-
-        # Process each account
-        for row in rows:
-            account_id, pocket_id, provider = row
-            print(f"🔍 Checking transactions for {provider} account {account_id}, pocket {pocket_id}", flush=True)
-
-            # Handle based on provider
+            try:
+                response = requests.get(f"{simplefin_access_url}/accounts", params=params, timeout=60)
+                if response.status_code == 200:
+                    simplefin_data = parse_json(response)
+                    print(f"✅ SimpleFin batch fetch returned {len(simplefin_data.get('accounts', []))} accounts", flush=True)
+                else:
+                    print(f"❌ SimpleFin API error: {response.status_code} - {response.text}", flush=True)
+                    if response.status_code == 403:
+                        print("🚫 SimpleFin token has been revoked or is invalid", flush=True)
+                        c.execute("UPDATE simplefin_config SET is_valid = 0")
+                        conn.commit()
+            finally:
+                # Nothing was synced - release the claims so these accounts are retried next check
+                if simplefin_data is None:
+                    for account_id, previous in claimed.items():
+                        release_simplefin_sync(account_id, previous)
+
+        # Work out which accounts need processing; LunchFlow cards are checked every tick
+        lunchflow_api_key = get_lunchflow_api_key() if any(row[2] == 'lunchflow' for row in rows) else None
+        simplefin_due = {acc_id: reason for acc_id, _, reason in simplefin_to_sync} if simplefin_data is not None else {}
+        jobs = []
+        for account_id, pocket_id, provider in rows:
             if provider == 'lunchflow':
-                api_key = get_lunchflow_api_key()
-                if not api_key:
+                if not lunchflow_api_key:
                     print("⚠️ LUNCHFLOW_API_KEY not set")
                     continue
-                check_lunchflow_transactions(conn, c, account_id, pocket_id, api_key)
-
+                jobs.append((account_id, pocket_id, provider, lunchflow_api_key, None, None, None))
             elif provider == 'simplefin':
-                sf_entry = next((a for a in simplefin_to_sync if a[0] == account_id), None)
-                if not sf_entry or simplefin_data is None:
+                if account_id not in simplefin_due:
                     continue  # Not due for sync, or batch fetch failed
+                jobs.append((account_id, pocket_id, provider, None, simplefin_access_url, simplefin_data, simplefin_due[account_id]))
 
-                _, _, reason = sf_entry
-                print(f"✅ Processing SimpleFin account {account_id} from batch data ({reason})", flush=True)
-                check_simplefin_transactions(conn, c, account_id, pocket_id, simplefin_access_url, prefetched_data=simplefin_data)
-
-                # Update per-account last sync time
-                _last_simplefin_sync[account_id] = time.time()
+        # Accounts are independent and I/O-bound, so sync them in parallel (each on its own connection),
+        # invalidating the affected cache entries once at the end
+        any_changes = False
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(_credit_card_sync_workers, len(jobs))) as executor:
+                any_changes = any(list(executor.map(lambda job: sync_credit_card_account(*job), jobs)))
 
         # Update global last sync timestamp if any SimpleFin accounts were synced
         if simplefin_to_sync and simplefin_data is not None:
@@ -2410,13 +2813,54 @@ def check_credit_card_transactions():
             conn.commit()
 
         conn.close()
+
+        if any_changes:
+            cache.delete_prefix(*POCKET_CACHE_PREFIXES)
     except Exception as e:
         print(f"❌ Error checking credit card transactions: {e}", flush=True)
         import traceback
         traceback.print_exc()
 
+def sync_credit_card_account(account_id, pocket_id, provider, api_key=None, access_url=None, simplefin_data=None, reason=None):
+    """Sync one tracked card on its own connection (run from the background checker's thread pool).
+
+    Returns True if cached pocket data is now stale.
+    """
+    print(f"🔍 Checking transactions for {provider} account {account_id}, pocket {pocket_id}", flush=True)
+    conn = _db()
+    c = conn.cursor()
+    try:
+        if provider == 'lunchflow':
+            return check_lunchflow_transactions(conn, c, account_id, pocket_id, api_key)
+
+        print(f"✅ Processing SimpleFin account {account_id} from batch data ({reason})", flush=True)
+        try:
+            return check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, prefetched_data=simplefin_data)
+        finally:
+            # Update per-account last sync time (and end the claim, even if processing failed)
+            mark_simplefin_synced(account_id)
+    finally:
+        conn.close()
+
+def lunchflow_get(path, headers, timeout=30):
+    """GET from the LunchFlow API, falling back to the legacy host only on connection errors/timeouts"""
+    global _lunchflow_host, _lunchflow_fallback_since
+    if _lunchflow_host != LUNCHFLOW_PRIMARY_HOST and time.time() - _lunchflow_fallback_since >= _lunchflow_reprobe_interval:
+        _lunchflow_host = LUNCHFLOW_PRIMARY_HOST
+
+    try:
+        return requests.get(f"{_lunchflow_host}{path}", headers=headers, timeout=timeout)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        if _lunchflow_host == LUNCHFLOW_FALLBACK_HOST:
+            raise
+        print(f"⚠️ LunchFlow unreachable at {LUNCHFLOW_PRIMARY_HOST}, falling back to {LUNCHFLOW_FALLBACK_HOST}", flush=True)
+        _lunchflow_host = LUNCHFLOW_FALLBACK_HOST
+        _lunchflow_fallback_since = time.time()
+        return requests.get(f"{_lunchflow_host}{path}", headers=headers, timeout=timeout)
+
 def check_lunchflow_transactions(conn, c, account_id, pocket_id, api_key):
-    """Check LunchFlow for new transactions"""
+    """Check LunchFlow for new transactions (returns True if cached pocket data is now stale)"""
+    changed = False
     try:
         # Get when credit card was added
         c.execute("SELECT created_at FROM credit_card_config WHERE account_id = ?", (account_id,))
@@ -2425,20 +2869,19 @@ def check_lunchflow_transactions(conn, c, account_id, pocket_id, api_key):
 
         # Fetch transactions from LunchFlow
         headers = {"x-api-key": api_key, "accept": "application/json"}
-        try:
-            response = requests.get(f"https://www.lunchflow.app/api/v1/accounts/{account_id}/transactions", headers=headers, timeout=30)
-        except:
-            response = requests.get(f"https://lunchflow.com/api/v1/accounts/{account_id}/transactions", headers=headers, timeout=30)
+        response = lunchflow_get(f"/api/v1/accounts/{account_id}/transactions", headers)
 
         if response.status_code != 200:
-            return
+            return changed
 
-        data = response.json()
+        data = parse_json(response)
         transactions = data.get("transactions", [])
 
-        # Get list of already seen transaction IDs
-        c.execute("SELECT transaction_id FROM credit_card_transactions WHERE account_id = ?", (account_id,))
-        seen_ids = {row[0] for row in c.fetchall()}
+        # Get list of already seen transaction IDs (idle cards return nothing, so skip the lookup)
+        seen_ids = set()
+        if transactions:
+            c.execute("SELECT transaction_id FROM credit_card_transactions WHERE account_id = ?", (account_id,))
+            seen_ids = {row[0] for row in c.fetchall()}
 
         new_transactions = []
         for tx in transactions:
@@ -2457,51 +2900,50 @@ def check_lunchflow_transactions(conn, c, account_id, pocket_id, api_key):
                 new_transactions.append(tx)
 
         conn.commit()
+        changed = bool(new_transactions)
 
         # Update pocket balance
         if pocket_id:
             balance_headers = {"x-api-key": api_key, "accept": "application/json"}
-            balance_response = requests.get(f"https://www.lunchflow.app/api/v1/accounts/{account_id}/balance", headers=balance_headers, timeout=30)
-            if balance_response.status_code == 200:
-                balance_data = balance_response.json()
+            cached_balance = _lunchflow_balances.get(account_id)
+            if cached_balance:
+                balance_headers["If-Modified-Since"] = cached_balance[0]
+            balance_response = lunchflow_get(f"/api/v1/accounts/{account_id}/balance", balance_headers)
+
+            target_balance = None
+            if balance_response.status_code == 304 and cached_balance:
+                # Balance unchanged since last fetch - already saved, just reconcile the pocket
+                target_balance = abs(cached_balance[1])
+            elif balance_response.status_code == 200:
+                balance_data = parse_json(balance_response)
                 balance_amount = balance_data.get("balance", {}).get("amount", 0)
                 target_balance = abs(balance_amount)
+                last_modified = balance_response.headers.get("Last-Modified")
+                if last_modified:
+                    _lunchflow_balances[account_id] = (last_modified, balance_amount)
+                else:
+                    _lunchflow_balances.pop(account_id, None)
 
-                # Save current balance to database
-                c.execute("UPDATE credit_card_config SET current_balance = ? WHERE account_id = ?", (target_balance, account_id))
+                # Save current balance to database (only counts as a change if it actually moved)
+                c.execute("UPDATE credit_card_config SET current_balance = ? WHERE account_id = ? AND current_balance IS NOT ?",
+                         (target_balance, account_id, target_balance))
                 conn.commit()
+                if c.rowcount > 0:
+                    changed = True
 
+            if target_balance is not None:
                 headers_crew = get_crew_headers()
                 if headers_crew:
-                    query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                    response_crew = requests.post(URL, headers=headers_crew, json={
-                        "operationName": "GetSubaccount",
-                        "variables": {"id": pocket_id},
-                        "query": query_string
-                    })
+                    current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
+
+                    difference_cents = to_cents(target_balance) - current_cents
 
-                    crew_data = response_crew.json()
-                    current_balance = 0
-                    try:
-                        current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                    except:
-                        pass
-
-                    difference = target_balance - current_balance
-                    all_subs = get_subaccounts_list()
-                    if "error" not in all_subs:
-                        checking_subaccount_id = None
-                        for sub in all_subs.get("subaccounts", []):
-                            if sub["name"] == "Checking":
-                                checking_subaccount_id = sub["id"]
-                                break
-
-                        if checking_subaccount_id and abs(difference) > 0.01:
-                            if difference > 0:
-                                move_money(checking_subaccount_id, pocket_id, str(difference), f"LunchFlow credit card sync")
-                            else:
-                                move_money(pocket_id, checking_subaccount_id, str(abs(difference)), f"LunchFlow credit card sync")
-                        cache.clear()
+                    if checking_subaccount_id and abs(difference_cents) > 1:
+                        if difference_cents > 0:
+                            move_money_cents(checking_subaccount_id, pocket_id, difference_cents, f"LunchFlow credit card sync")
+                        else:
+                            move_money_cents(pocket_id, checking_subaccount_id, -difference_cents, f"LunchFlow credit card sync")
+                        changed = True
 
         if new_transactions:
             print(f"✅ Found {len(new_transactions)} new LunchFlow credit card transactions")
@@ -2511,13 +2953,18 @@ def check_lunchflow_transactions(conn, c, account_id, pocket_id, api_key):
     except Exception as e:
         print(f"Error checking LunchFlow transactions: {e}")
 
+    return changed
+
 def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_initial_sync=False, prefetched_data=None):
     """Check SimpleFin for new transactions
 
     Args:
         is_initial_sync: If True, don't move money for transactions (just store them)
         prefetched_data: Pre-fetched API response to avoid duplicate calls when syncing multiple accounts
+
+    Returns True if cached pocket data is now stale (new transactions, balance change or money moved).
     """
+    changed = False
     try:
         if prefetched_data is not None:
             data = prefetched_data
@@ -2526,7 +2973,6 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
             print(f"🔍 check_simplefin_transactions: Fetching from {access_url[:30]}... for account {account_id} (initial={is_initial_sync})", flush=True)
 
             # Calculate date range: current calendar month
-            from datetime import datetime, timezone
             now_utc = datetime.now(timezone.utc)
             start_timestamp = int(datetime(now_utc.year, now_utc.month, 1, tzinfo=timezone.utc).timestamp())
             end_year, end_month = (now_utc.year + 1, 1) if now_utc.month == 12 else (now_utc.year, now_utc.month + 1)
@@ -2550,9 +2996,9 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
                     c.execute("UPDATE simplefin_config SET is_valid = 0")
                     conn.commit()
 
-                return
+                return changed
 
-            data = response.json()
+            data = parse_json(response)
 
         print(f"✅ SimpleFin API response received, found {len(data.get('accounts', []))} accounts")
 
@@ -2572,16 +3018,23 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
             print(f"❌ SimpleFin account {account_id} not found in response")
             all_account_ids = [acc.get("id") for acc in data.get("accounts", [])]
             print(f"   Available account IDs: {all_account_ids}")
-            return
+            return changed
 
         print(f"✅ SimpleFin: Found {len(transactions)} total transactions for account {account_id}")
 
-        # Get list of already seen transaction IDs
-        c.execute("SELECT transaction_id FROM credit_card_transactions WHERE account_id = ?", (account_id,))
-        seen_ids = {row[0] for row in c.fetchall()}
-        print(f"  Already have {len(seen_ids)} transactions in database")
+        # Get list of already seen transaction IDs (idle cards return nothing, so skip the lookup)
+        seen_ids = set()
+        if transactions:
+            # Hold the write lock from reading seen IDs through the batch insert, so every row inserted is really new
+            if not conn.in_transaction:
+                c.execute("BEGIN IMMEDIATE")
+            c.execute("SELECT transaction_id FROM credit_card_transactions WHERE account_id = ?", (account_id,))
+            seen_ids = {row[0] for row in c.fetchall()}
+            print(f"  Already have {len(seen_ids)} transactions in database")
 
         new_transactions = []
+        new_rows = []
+        total_new_cents = 0
         for tx in transactions:
             tx_id = tx.get("id")
             if not tx_id:
@@ -2589,14 +3042,16 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
                 continue
             if tx_id in seen_ids:
                 continue
+            seen_ids.add(tx_id)  # Also dedupes repeats within this response
 
-            # SimpleFin amounts may be strings, convert to float
+            # SimpleFin amounts are decimal strings - parse once into exact integer cents
             amount_str = tx.get("amount", "0")
             try:
-                amount = abs(float(amount_str))  # SimpleFin amounts are in dollars, negative for debits
-            except (ValueError, TypeError):
+                amount_cents = abs(to_cents(amount_str))  # SimpleFin amounts are in dollars, negative for debits
+            except InvalidOperation:
                 print(f"  ⚠️ Could not parse transaction amount '{amount_str}', using 0")
-                amount = 0
+                amount_cents = 0
+            amount = amount_cents / 100  # Stored in dollars, like LunchFlow transactions
 
             description = tx.get("description", "")
             posted = tx.get("posted")  # Unix timestamp
@@ -2605,33 +3060,27 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
 
             # Convert Unix timestamp to ISO date string if available
             date_str = None
-            if posted:
+            timestamp = posted or transacted
+            if timestamp:
                 try:
-                    from datetime import datetime
-                    date_str = datetime.fromtimestamp(int(posted)).isoformat()
-                except:
-                    date_str = str(posted)
-            elif transacted:
-                try:
-                    from datetime import datetime
-                    date_str = datetime.fromtimestamp(int(transacted)).isoformat()
-                except:
-                    date_str = str(transacted)
+                    date_str = datetime.fromtimestamp(int(timestamp)).isoformat()
+                except (TypeError, ValueError, OverflowError, OSError):
+                    date_str = str(timestamp)  # Not a usable Unix timestamp - keep it as given
 
-            print(f"  💳 New transaction: ${amount} - {description} (ID: {tx_id})")
+            print(f"  💳 New transaction: ${format_cents(amount_cents)} - {description} (ID: {tx_id})")
 
-            c.execute("""INSERT OR IGNORE INTO credit_card_transactions
-                         (transaction_id, account_id, amount, date, merchant, description, is_pending)
-                         VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                     (tx_id, account_id, amount, date_str, "", description, 1 if pending else 0))
+            new_rows.append((tx_id, account_id, amount, date_str, "", description, 1 if pending else 0))
+            new_transactions.append(tx)
+            total_new_cents += amount_cents
 
-            if c.rowcount > 0:
-                new_transactions.append(tx)
-                print(f"  ✅ Inserted transaction {tx_id}")
-            else:
-                print(f"  ⚠️ Transaction {tx_id} was not inserted (already exists or error)")
+        # One batched insert - the initial sync can bring in hundreds of historical rows
+        if new_rows:
+            c.executemany("""INSERT OR IGNORE INTO credit_card_transactions
+                             (transaction_id, account_id, amount, date, merchant, description, is_pending)
+                             VALUES (?, ?, ?, ?, ?, ?, ?)""", new_rows)
 
         conn.commit()
+        changed = bool(new_transactions)
         print(f"✅ Committed {len(new_transactions)} new transactions to database")
 
         # Move money from Checking to Credit Card pocket for each new transaction
@@ -2640,37 +3089,34 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
             headers_crew = get_crew_headers()
             if headers_crew:
                 # Get Checking subaccount ID
-                all_subs = get_subaccounts_list()
-                checking_subaccount_id = None
-                if "error" not in all_subs:
-                    for sub in all_subs.get("subaccounts", []):
-                        if sub["name"] == "Checking":
-                            checking_subaccount_id = sub["id"]
-                            break
+                checking_subaccount_id = get_checking_subaccount_id()
 
                 if checking_subaccount_id:
-                    total_new_spending = sum(abs(float(tx.get("amount", 0))) for tx in new_transactions)
-                    if total_new_spending > 0.01:
-                        print(f"💸 Moving ${total_new_spending:.2f} from Checking to Credit Card pocket for {len(new_transactions)} new transaction(s)", flush=True)
-                        move_money(checking_subaccount_id, pocket_id, str(total_new_spending), f"SimpleFin: {len(new_transactions)} new transaction(s)")
-                        cache.clear()
+                    if total_new_cents > 0:
+                        total_new_spending = format_cents(total_new_cents)
+                        print(f"💸 Moving ${total_new_spending} from Checking to Credit Card pocket for {len(new_transactions)} new transaction(s)", flush=True)
+                        move_money_cents(checking_subaccount_id, pocket_id, total_new_cents, f"SimpleFin: {len(new_transactions)} new transaction(s)")
         elif new_transactions and is_initial_sync:
             print(f"⏭️ Skipping automatic money movement for initial sync ({len(new_transactions)} historical transactions stored)", flush=True)
 
         # Update pocket balance to match SimpleFin balance
         # Always save the balance to database, even during initial sync
         if pocket_id:
-            # SimpleFin returns balance as a string, convert to float
+            # SimpleFin returns balance as a decimal string, convert to exact cents
             balance_str = target_account.get("balance", "0")
             try:
-                target_balance = abs(float(balance_str))
-            except (ValueError, TypeError):
+                target_balance_cents = abs(to_cents(balance_str))
+            except InvalidOperation:
                 print(f"Warning: Could not parse balance '{balance_str}', using 0")
-                target_balance = 0
+                target_balance_cents = 0
+            target_balance = target_balance_cents / 100
 
             # Save current balance to database (always, even for initial sync)
-            c.execute("UPDATE credit_card_config SET current_balance = ? WHERE account_id = ? AND provider = 'simplefin'", (target_balance, account_id))
+            c.execute("UPDATE credit_card_config SET current_balance = ? WHERE account_id = ? AND provider = 'simplefin' AND current_balance IS NOT ?",
+                     (target_balance, account_id, target_balance))
             conn.commit()
+            if c.rowcount > 0:
+                changed = True
 
             # Skip automatic pocket syncing on initial sync to avoid huge transfers
             if is_initial_sync:
@@ -2679,35 +3125,17 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
                 # Only sync pocket balance during regular syncs (not initial sync)
                 headers_crew = get_crew_headers()
                 if headers_crew:
-                    query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                    response_crew = requests.post(URL, headers=headers_crew, json={
-                        "operationName": "GetSubaccount",
-                        "variables": {"id": pocket_id},
-                        "query": query_string
-                    })
+                    current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
 
-                    crew_data = response_crew.json()
-                    current_balance = 0
-                    try:
-                        current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                    except:
-                        pass
-
-                    difference = target_balance - current_balance
-                    all_subs = get_subaccounts_list()
-                    if "error" not in all_subs:
-                        checking_subaccount_id = None
-                        for sub in all_subs.get("subaccounts", []):
-                            if sub["name"] == "Checking":
-                                checking_subaccount_id = sub["id"]
-                                break
-
-                        if checking_subaccount_id and abs(difference) > 0.01:
-                            if difference > 0:
-                                move_money(checking_subaccount_id, pocket_id, str(difference), f"SimpleFin credit card sync")
-                            else:
-                                move_money(pocket_id, checking_subaccount_id, str(abs(difference)), f"SimpleFin credit card sync")
-                        cache.clear()
+                    # Exact cents arithmetic, so even a 1-cent drift gets corrected
+                    difference_cents = target_balance_cents - current_cents
+
+                    if checking_subaccount_id and difference_cents != 0:
+                        if difference_cents > 0:
+                            move_money_cents(checking_subaccount_id, pocket_id, difference_cents, f"SimpleFin credit card sync")
+                        else:
+                            move_money_cents(pocket_id, checking_subaccount_id, -difference_cents, f"SimpleFin credit card sync")
+                        changed = True
 
         if new_transactions:
             print(f"✅ Found {len(new_transactions)} new SimpleFin credit card transactions")
@@ -2718,6 +3146,10 @@ def check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_
         print(f"❌ Error checking SimpleFin transactions: {e}")
         import traceback
         traceback.print_exc()
+        if conn.in_transaction:
+            conn.rollback()
+
+    return changed
 
 @app.route('/api/lunchflow/last-check-time')
 def api_last_check_time():
@@ -2736,11 +3168,30 @@ def api_last_check_time():
 def background_transaction_checker():
     """Background thread that checks for new transactions every 30 seconds"""
     while True:
+        # Clear before checking: a wake-up that arrives while the check runs makes the next wait return at once
+        _wake_checker.clear()
         try:
             check_credit_card_transactions()
         except Exception as e:
             print(f"Error in background transaction checker: {e}")
-        time.sleep(30)  # Check every 30 seconds
+        _wake_checker.wait(30)  # Check every 30 seconds, or sooner if woken by a handler
+
+def background_pocket_deleter():
+    """Background thread that deletes queued pockets, so handlers don't wait on the Crew delete call"""
+    while True:
+        pocket_id = _pocket_deletions.get()
+        try:
+            result = delete_subaccount_action(pocket_id)
+            if "error" in result:
+                logger.warning("Error deleting pocket %s: %s", pocket_id, result["error"])
+        except Exception as e:
+            logger.warning("Error deleting pocket %s: %s", pocket_id, e)
+        finally:
+            _pocket_deletions.task_done()
+
+def wake_transaction_checker():
+    """Ask the background checker to run now (e.g. after a pocket is created or the schedule changes)"""
+    _wake_checker.set()
 
 def start_background_thread_once():
     """Start the background thread exactly once (thread-safe)"""
@@ -2750,6 +3201,7 @@ def start_background_thread_once():
             transaction_thread = threading.Thread(target=background_transaction_checker, daemon=True)
             transaction_thread.start()
             print("🔄 Credit card transaction checker started (checks every 30 seconds)", flush=True)
+            threading.Thread(target=background_pocket_deleter, daemon=True).start()
             _background_thread_started = True
 
 @app.before_request
@@ -2763,42 +3215,44 @@ def api_get_credit_card_transactions():
     try:
         account_id = request.args.get('accountId')  # Optional filter
 
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        # Runs the query now (so a database error still becomes a 500) and streams the serialized rows
+        return Response(stream_credit_card_transactions(account_id), mimetype="application/json")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def stream_credit_card_transactions(account_id=None):
+    """Yield the {"transactions": [...]} response as JSON chunks.
 
+    The rows (at most 100) are fetched up front so the pooled reader goes back to the pool before any
+    bytes reach the client - a slow or aborted client must not hold a database connection.
+    """
+    with db_read() as c:
         if account_id:
             # Filter by specific account
-            c.execute("""SELECT transaction_id, amount, date, merchant, description, is_pending, created_at
-                         FROM credit_card_transactions
-                         WHERE account_id = ?
-                         ORDER BY date DESC, created_at DESC
-                         LIMIT 100""", (account_id,))
+            c.execute(SQL_GET_TRANSACTIONS_FOR_ACCOUNT, (account_id,))
         else:
             # Return all accounts
-            c.execute("""SELECT transaction_id, amount, date, merchant, description, is_pending, created_at
-                         FROM credit_card_transactions
-                         ORDER BY date DESC, created_at DESC
-                         LIMIT 100""")
-
+            c.execute(SQL_GET_TRANSACTIONS)
         rows = c.fetchall()
-        conn.close()
 
-        transactions = []
-        for row in rows:
-            transactions.append({
-                "id": row[0],
-                "amount": row[1],
-                "date": row[2],
-                "merchant": row[3],
-                "description": row[4],
-                "isPending": bool(row[5]),
-                "syncedAt": row[6],
+    def generate():
+        yield b'{"transactions":['
+        separator = b""
+        for tx_id, amount, tx_date, merchant, description, is_pending, created_at in rows:
+            yield separator + json_bytes({
+                "id": tx_id,
+                "amount": amount,
+                "date": tx_date,
+                "merchant": merchant,
+                "description": description,
+                "isPending": bool(is_pending),
+                "syncedAt": created_at,
                 "isCreditCard": True  # Flag to identify credit card transactions
             })
+            separator = b","
+        yield b"]}"
 
-        return jsonify({"transactions": transactions})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return generate()
 
 # --- SIMPLEFIN API ENDPOINTS ---
 import base64
@@ -2809,28 +3263,23 @@ def store_simplefin_access_url(access_url):
     try:
         print(f"🔍 store_simplefin_access_url called with access_url: {access_url[:50] if access_url else 'None'}...", flush=True)
 
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-
-        # Check if we already have an access URL
-        c.execute("SELECT id FROM simplefin_config LIMIT 1")
-        existing = c.fetchone()
+        with db_write() as c:
+            # Check if we already have an access URL
+            c.execute(SQL_GET_SIMPLEFIN_CONFIG_ID)
+            existing = c.fetchone()
 
-        if existing:
-            # Update existing access URL and mark as valid
-            print("Updating existing SimpleFin access URL", flush=True)
-            c.execute("UPDATE simplefin_config SET access_url = ?, is_valid = 1 WHERE id = ?", (access_url, existing[0]))
-        else:
-            # Insert new access URL (is_valid defaults to 1)
-            print("Storing new SimpleFin access URL", flush=True)
-            c.execute("INSERT INTO simplefin_config (access_url, is_valid) VALUES (?, 1)", (access_url,))
+            if existing:
+                # Update existing access URL and mark as valid
+                print("Updating existing SimpleFin access URL", flush=True)
+                c.execute(SQL_UPDATE_SIMPLEFIN_ACCESS_URL, (access_url, existing[0]))
+            else:
+                # Insert new access URL (is_valid defaults to 1)
+                print("Storing new SimpleFin access URL", flush=True)
+                c.execute(SQL_INSERT_SIMPLEFIN_ACCESS_URL, (access_url,))
 
-        conn.commit()
-        rows_affected = c.rowcount
-        conn.close()
+            rows_affected = c.rowcount
 
         print(f"✅ SimpleFin access URL stored successfully ({rows_affected} rows affected)", flush=True)
-        cache.clear()
         return True
     except Exception as e:
         print(f"❌ ERROR storing SimpleFin access URL: {e}", flush=True)
@@ -2862,6 +3311,7 @@ def simplefin_claim_token(token):
     except Exception as e:
         return {"error": f"Failed to claim token: {str(e)}"}
 
+@cached("simplefin:accounts", ttl=15)  # Short TTL: just collapses near-simultaneous calls into one upstream request
 def simplefin_get_accounts(access_url, account_id=None):
     """Fetch accounts from SimpleFin using the access URL"""
     try:
@@ -2877,19 +3327,20 @@ def simplefin_get_accounts(access_url, account_id=None):
             # If 403, mark token as invalid
             if response.status_code == 403:
                 print("🚫 SimpleFin token has been revoked or is invalid (get_accounts)", flush=True)
-                conn = sqlite3.connect(DB_FILE)
-                c = conn.cursor()
-                c.execute("UPDATE simplefin_config SET is_valid = 0")
-                conn.commit()
-                conn.close()
+                with db_write() as c:
+                    c.execute("UPDATE simplefin_config SET is_valid = 0")
 
             return {"error": f"SimpleFin API error: {response.status_code} - {response.text}"}
 
-        data = response.json()
+        data = parse_json(response)
 
         # Transform SimpleFin format to match our expected format
         accounts = []
         for account in data.get("accounts", []):
+            # Some SimpleFin servers ignore the account filter - don't shape accounts nobody asked for
+            if account_id and account.get("id") != account_id:
+                continue
+
             # SimpleFin returns balance as a string, convert to float
             balance_str = account.get("balance", "0")
             try:
@@ -2913,13 +3364,10 @@ def simplefin_get_accounts(access_url, account_id=None):
 def api_simplefin_get_access_url():
     """Get the stored SimpleFin access URL if it exists"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-
         # Get SimpleFin access URL from global config
-        c.execute("SELECT access_url FROM simplefin_config LIMIT 1")
-        row = c.fetchone()
-        conn.close()
+        with db_read() as c:
+            c.execute(SQL_GET_SIMPLEFIN_ACCESS_URL)
+            row = c.fetchone()
 
         if row and row[0]:
             print(f"✅ SimpleFin access URL found (url length: {len(row[0])})", flush=True)
@@ -2990,19 +3438,11 @@ def api_simplefin_set_credit_card():
         return jsonify({"error": "accountId is required"}), 400
 
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-
         # Insert or ignore the account selection (allows multiple accounts, access_url is stored globally in simplefin_config)
-        c.execute("""INSERT OR IGNORE INTO credit_card_config
-                     (account_id, account_name, provider, created_at)
-                     VALUES (?, ?, 'simplefin', CURRENT_TIMESTAMP)""",
-                  (account_id, account_name))
+        with db_write() as c:
+            c.execute(SQL_INSERT_SIMPLEFIN_ACCOUNT, (account_id, account_name))
 
-        conn.commit()
-        conn.close()
-
-        cache.clear()
+        # Nothing cached depends on the account selection until a pocket exists, so no invalidation here
         return jsonify({"success": True, "message": "SimpleFin credit card account saved", "needsBalanceSync": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -3043,21 +3483,19 @@ def api_simplefin_create_pocket_with_balance():
         return jsonify({"error": "accountId is required"}), 400
 
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        with db_read() as c:
+            # Get account info
+            c.execute("SELECT account_name FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'", (account_id,))
+            row = c.fetchone()
+
+            # Get SimpleFin access URL from global config
+            c.execute(SQL_GET_SIMPLEFIN_ACCESS_URL)
+            url_row = c.fetchone()
 
-        # Get account info
-        c.execute("SELECT account_name FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'", (account_id,))
-        row = c.fetchone()
         if not row:
-            conn.close()
             return jsonify({"error": "SimpleFin account not found. Please select an account first."}), 400
 
         account_name = row[0]
-
-        # Get SimpleFin access URL from global config
-        c.execute("SELECT access_url FROM simplefin_config LIMIT 1")
-        url_row = c.fetchone()
         access_url = url_row[0] if url_row else None
 
         # Fetch balance and transactions from SimpleFin in a single request
@@ -3081,16 +3519,18 @@ def api_simplefin_create_pocket_with_balance():
                 }
                 response = requests.get(f"{access_url}/accounts", params=params, timeout=60)
                 if response.status_code == 200:
-                    simplefin_data = response.json()
+                    simplefin_data = parse_json(response)
                     for account in simplefin_data.get("accounts", []):
                         if account.get("id") == account_id:
+                            # Parse the decimal string once into exact cents, reused for the pocket amount and the DB value
                             balance_str = account.get("balance", "0")
                             try:
-                                current_balance_value = abs(float(balance_str))
-                            except (ValueError, TypeError):
-                                current_balance_value = 0
+                                balance_cents = abs(to_cents(balance_str))
+                            except InvalidOperation:
+                                balance_cents = 0
+                            current_balance_value = balance_cents / 100
                             if sync_balance:
-                                initial_amount = str(current_balance_value)
+                                initial_amount = format_cents(balance_cents)
                             break
                 else:
                     print(f"Warning: SimpleFin API error {response.status_code}: {response.text}", flush=True)
@@ -3102,36 +3542,36 @@ def api_simplefin_create_pocket_with_balance():
         pocket_result = create_pocket(pocket_name, "0", initial_amount, f"SimpleFin credit card tracking pocket for {account_name}")
 
         if "error" in pocket_result:
-            conn.close()
             return jsonify({"error": f"Failed to create pocket: {pocket_result['error']}"}), 500
 
         pocket_id = pocket_result.get("result", {}).get("id")
         if not pocket_id:
-            conn.close()
             return jsonify({"error": "Pocket was created but no ID was returned"}), 500
 
         # Update the config with pocket_id and current_balance
-        c.execute("UPDATE credit_card_config SET pocket_id = ?, current_balance = ? WHERE account_id = ? AND provider = 'simplefin'",
-                 (pocket_id, current_balance_value, account_id))
-        conn.commit()
+        with db_write() as c:
+            c.execute("UPDATE credit_card_config SET pocket_id = ?, current_balance = ? WHERE account_id = ? AND provider = 'simplefin'",
+                     (pocket_id, current_balance_value, account_id))
 
         # Process initial transactions using the data already fetched above — no second API call
         if simplefin_data:
             print(f"🔄 Processing initial transactions for newly added SimpleFin account {account_id} (balance synced: {sync_balance})", flush=True)
-            global _last_simplefin_sync
 
+            # Own connection, like the background checker - this can move money, so it mustn't hold the shared writer
+            conn = _db()
+            c = conn.cursor()
             try:
                 check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, is_initial_sync=True, prefetched_data=simplefin_data)
-                _last_simplefin_sync[account_id] = time.time()
+                mark_simplefin_synced(account_id)
                 print(f"✅ Initial transaction sync complete for account {account_id}, hourly timer reset", flush=True)
             except Exception as e:
                 print(f"⚠️ Error processing initial transactions: {e}", flush=True)
                 import traceback
                 traceback.print_exc()
+            finally:
+                conn.close()
 
-        conn.close()
-
-        cache.clear()
+        cache.delete_prefix(*POCKET_CACHE_PREFIXES)
         return jsonify({"success": True, "message": "SimpleFin credit card pocket created", "pocketId": pocket_id, "syncedBalance": sync_balance})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -3146,23 +3586,20 @@ def api_simplefin_sync_balance():
         return jsonify({"error": "accountId is required"}), 400
 
     try:
-        # Get pocket_id from database
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT pocket_id FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'", (account_id,))
-        row = c.fetchone()
+        with db_read() as c:
+            # Get pocket_id from database
+            c.execute(SQL_GET_SIMPLEFIN_POCKET_ID, (account_id,))
+            row = c.fetchone()
+
+            # Get SimpleFin access URL from global config
+            c.execute(SQL_GET_SIMPLEFIN_ACCESS_URL)
+            url_row = c.fetchone()
 
         if not row or not row[0]:
-            conn.close()
             return jsonify({"error": "No SimpleFin pocket found for this account"}), 400
 
         pocket_id = row[0]
 
-        # Get SimpleFin access URL from global config
-        c.execute("SELECT access_url FROM simplefin_config LIMIT 1")
-        url_row = c.fetchone()
-        conn.close()
-
         if not url_row or not url_row[0]:
             return jsonify({"error": "SimpleFin access URL not found"}), 400
 
@@ -3180,60 +3617,33 @@ def api_simplefin_sync_balance():
                 break
 
         # Save current balance to database
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("UPDATE credit_card_config SET current_balance = ? WHERE account_id = ? AND provider = 'simplefin'", (target_balance, account_id))
-        conn.commit()
-        conn.close()
+        with db_write() as c:
+            c.execute(SQL_UPDATE_SIMPLEFIN_BALANCE, (target_balance, account_id))
 
         # Get current pocket balance
         headers_crew = get_crew_headers()
         if not headers_crew:
             return jsonify({"error": "Crew credentials not found"}), 400
 
-        query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-        response_crew = requests.post(URL, headers=headers_crew, json={
-            "operationName": "GetSubaccount",
-            "variables": {"id": pocket_id},
-            "query": query_string
-        })
-
-        crew_data = response_crew.json()
-        current_balance = 0
-        try:
-            current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-        except:
-            pass
-
-        # Calculate difference
-        difference = target_balance - current_balance
-
-        # Get Checking subaccount ID
-        all_subs = get_subaccounts_list()
-        if "error" in all_subs:
-            return jsonify({"error": "Could not get subaccounts list"}), 400
-
-        checking_subaccount_id = None
-        for sub in all_subs.get("subaccounts", []):
-            if sub["name"] == "Checking":
-                checking_subaccount_id = sub["id"]
-                break
+        current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
 
+        # Calculate difference in exact cents
+        difference_cents = to_cents(target_balance) - current_cents
         if not checking_subaccount_id:
             return jsonify({"error": "Could not find Checking subaccount"}), 400
 
         # Transfer money to/from pocket
-        if abs(difference) > 0:  # Only transfer if difference is significant
-            if difference > 0:
-                result = move_money(checking_subaccount_id, pocket_id, str(difference), f"SimpleFin sync credit card balance")
+        if difference_cents != 0:
+            if difference_cents > 0:
+                result = move_money_cents(checking_subaccount_id, pocket_id, difference_cents, f"SimpleFin sync credit card balance")
             else:
-                result = move_money(pocket_id, checking_subaccount_id, str(abs(difference)), f"SimpleFin sync credit card balance")
+                result = move_money_cents(pocket_id, checking_subaccount_id, -difference_cents, f"SimpleFin sync credit card balance")
 
             if "error" in result:
                 return jsonify({"error": f"Failed to sync balance: {result['error']}"}), 500
 
-        cache.clear()
-        return jsonify({"success": True, "message": "Balance synced", "targetBalance": target_balance, "previousBalance": current_balance})
+        cache.delete_prefix(*POCKET_CACHE_PREFIXES)
+        return jsonify({"success": True, "message": "Balance synced", "targetBalance": target_balance, "previousBalance": current_cents / 100})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -3241,54 +3651,29 @@ def api_simplefin_sync_balance():
 def api_simplefin_change_account():
     """Delete the SimpleFin credit card pocket and clear config"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        with db_read() as c:
+            # Get current config
+            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE pocket_id IS NOT NULL AND provider = 'simplefin' LIMIT 1")
+            row = c.fetchone()
 
-        # Get current config
-        c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE pocket_id IS NOT NULL AND provider = 'simplefin' LIMIT 1")
-        row = c.fetchone()
+            if not row:
+                # Check if there's any config at all
+                c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE provider = 'simplefin' LIMIT 1")
+                row = c.fetchone()
 
         if not row:
-            # Check if there's any config at all
-            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE provider = 'simplefin' LIMIT 1")
-            row = c.fetchone()
-            if not row:
-                conn.close()
-                return jsonify({"error": "No SimpleFin credit card account configured"}), 400
-            account_id = row[0]
-            pocket_id = row[1] if len(row) > 1 else None
-        else:
-            account_id, pocket_id = row[0], row[1]
+            return jsonify({"error": "No SimpleFin credit card account configured"}), 400
+        account_id, pocket_id = row
 
         # Get current pocket balance and return it to Checking
         headers_crew = get_crew_headers()
         if headers_crew and pocket_id:
             try:
-                query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                response_crew = requests.post(URL, headers=headers_crew, json={
-                    "operationName": "GetSubaccount",
-                    "variables": {"id": pocket_id},
-                    "query": query_string
-                })
-
-                crew_data = response_crew.json()
-                current_balance = 0
-                try:
-                    current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                except:
-                    pass
+                current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
 
                 # Return money to Checking if there's a balance
-                all_subs = get_subaccounts_list()
-                if "error" not in all_subs:
-                    checking_subaccount_id = None
-                    for sub in all_subs.get("subaccounts", []):
-                        if sub["name"] == "Checking":
-                            checking_subaccount_id = sub["id"]
-                            break
-
-                    if checking_subaccount_id and current_balance > 0.01:
-                        move_money(pocket_id, checking_subaccount_id, str(current_balance), "Returning SimpleFin credit card pocket funds to Safe-to-Spend")
+                if checking_subaccount_id and current_cents > 1:
+                    move_money_cents(pocket_id, checking_subaccount_id, current_cents, "Returning SimpleFin credit card pocket funds to Safe-to-Spend")
 
                 # Delete the pocket
                 delete_subaccount_action(pocket_id)
@@ -3297,13 +3682,11 @@ def api_simplefin_change_account():
 
         # Delete config and transactions for this specific account
         # Note: We keep the access_url in simplefin_config as it works for all accounts
-        c.execute("DELETE FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'", (account_id,))
-        c.execute("DELETE FROM credit_card_transactions WHERE account_id = ?", (account_id,))
-
-        conn.commit()
-        conn.close()
+        with db_write() as c:
+            c.execute(SQL_DELETE_SIMPLEFIN_ACCOUNT, (account_id,))
+            c.execute(SQL_DELETE_ACCOUNT_TRANSACTIONS, (account_id,))
 
-        cache.clear()
+        cache.delete_prefix(*POCKET_CACHE_PREFIXES)
         return jsonify({"success": True, "message": "SimpleFin account changed. Pocket deleted and funds returned to Safe-to-Spend."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -3318,15 +3701,12 @@ def api_simplefin_stop_tracking():
         if not account_id:
             return jsonify({"error": "accountId is required"}), 400
 
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-
         # Get current config for the specific account
-        c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE account_id = ? AND pocket_id IS NOT NULL AND provider = 'simplefin'", (account_id,))
-        row = c.fetchone()
+        with db_read() as c:
+            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE account_id = ? AND pocket_id IS NOT NULL AND provider = 'simplefin'", (account_id,))
+            row = c.fetchone()
 
         if not row:
-            conn.close()
             return jsonify({"error": "No SimpleFin credit card account configured with that ID"}), 400
 
         account_id, pocket_id = row[0], row[1]
@@ -3335,31 +3715,11 @@ def api_simplefin_stop_tracking():
         headers_crew = get_crew_headers()
         if headers_crew and pocket_id:
             try:
-                query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                response_crew = requests.post(URL, headers=headers_crew, json={
-                    "operationName": "GetSubaccount",
-                    "variables": {"id": pocket_id},
-                    "query": query_string
-                })
-
-                crew_data = response_crew.json()
-                current_balance = 0
-                try:
-                    current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                except:
-                    pass
+                current_cents, checking_subaccount_id = get_pocket_balance_cents_and_checking_id(pocket_id, headers_crew)
 
                 # Return money to Checking
-                all_subs = get_subaccounts_list()
-                if "error" not in all_subs:
-                    checking_subaccount_id = None
-                    for sub in all_subs.get("subaccounts", []):
-                        if sub["name"] == "Checking":
-                            checking_subaccount_id = sub["id"]
-                            break
-
-                    if checking_subaccount_id and current_balance > 0.01:
-                        move_money(pocket_id, checking_subaccount_id, str(current_balance), "Returning SimpleFin credit card pocket funds to Safe-to-Spend")
+                if checking_subaccount_id and current_cents > 1:
+                    move_money_cents(pocket_id, checking_subaccount_id, current_cents, "Returning SimpleFin credit card pocket funds to Safe-to-Spend")
 
                 # Delete the pocket
                 delete_subaccount_action(pocket_id)
@@ -3367,12 +3727,11 @@ def api_simplefin_stop_tracking():
                 print(f"Warning: Error deleting pocket: {e}")
 
         # Delete all config and transactions
-        c.execute("DELETE FROM credit_card_config WHERE account_id = ? AND provider = 'simplefin'", (account_id,))
-        c.execute("DELETE FROM credit_card_transactions WHERE account_id = ?", (account_id,))
-        conn.commit()
-        conn.close()
+        with db_write() as c:
+            c.execute(SQL_DELETE_SIMPLEFIN_ACCOUNT, (account_id,))
+            c.execute(SQL_DELETE_ACCOUNT_TRANSACTIONS, (account_id,))
 
-        cache.clear()
+        cache.delete_prefix(*POCKET_CACHE_PREFIXES)
         return jsonify({"success": True, "message": "SimpleFin tracking stopped. Pocket deleted and funds returned to Safe-to-Spend."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -3381,63 +3740,70 @@ def api_simplefin_stop_tracking():
 def api_simplefin_disconnect():
     """Completely disconnect SimpleFin - removes access URL and all account tracking"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-
-        # Get all SimpleFin accounts with pockets
-        c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE provider = 'simplefin' AND pocket_id IS NOT NULL")
-        accounts = c.fetchall()
+        # Get all SimpleFin accounts (their IDs drive the transaction cleanup) and those with pockets
+        with db_read() as c:
+            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE provider = 'simplefin'")
+            rows = c.fetchall()
+        account_ids = [account_id for account_id, _ in rows]
+        accounts = [(account_id, pocket_id) for account_id, pocket_id in rows if pocket_id is not None]
+
+        # Return funds and delete pockets for all accounts (no Crew calls at all when there are none)
+        headers_crew = get_crew_headers() if accounts else None
+        if headers_crew and accounts:
+            checking_subaccount_id = get_checking_subaccount_id()
+
+            # Read every pocket balance in one aliased query and return the funds in aliased transfer batches;
+            # the emptied pockets are deleted by the background deleter after the response is sent
+            note = "Disconnecting SimpleFin - returning funds"
+            try:
+                balances = get_subaccount_balances_cents([pocket_id for _, pocket_id in accounts], headers_crew)
+            except Exception as e:
+                logger.warning("Error fetching pocket balances, falling back to one query per pocket: %s", e)
+                balances = {}
 
-        # Return funds and delete pockets for all accounts
-        headers_crew = get_crew_headers()
-        if headers_crew:
-            # Get checking account
-            all_subs = get_subaccounts_list()
-            checking_subaccount_id = None
-            if "error" not in all_subs:
-                for sub in all_subs.get("subaccounts", []):
-                    if sub["name"] == "Checking":
-                        checking_subaccount_id = sub["id"]
-                        break
-
-            # Process each account
+            transfers = []
+            fallback = []  # Pockets released one at a time (unknown balance, or their transfer batch was rejected)
             for account_id, pocket_id in accounts:
-                try:
-                    # Get pocket balance
-                    query_string = """query GetSubaccount($id: ID!) { node(id: $id) { ... on Subaccount { id overallBalance } } }"""
-                    response_crew = requests.post(URL, headers=headers_crew, json={
-                        "operationName": "GetSubaccount",
-                        "variables": {"id": pocket_id},
-                        "query": query_string
-                    })
-
-                    crew_data = response_crew.json()
-                    current_balance = 0
-                    try:
-                        current_balance = crew_data.get("data", {}).get("node", {}).get("overallBalance", 0) / 100.0
-                    except:
-                        pass
-
-                    # Return money to Checking
-                    if checking_subaccount_id and current_balance > 0.01:
-                        move_money(pocket_id, checking_subaccount_id, str(current_balance), f"Disconnecting SimpleFin - returning funds")
+                current_cents = balances.get(pocket_id)
+                if current_cents is None:
+                    fallback.append((account_id, pocket_id))
+                elif current_cents <= 1:
+                    _pocket_deletions.put(pocket_id)  # Nothing to return
+                elif checking_subaccount_id:
+                    transfers.append((account_id, pocket_id, current_cents))
+                else:
+                    logger.warning("Checking subaccount not found; keeping the funded pocket for account %s", account_id)
+
+            if transfers:
+                results = move_money_batch([(pocket_id, checking_subaccount_id, current_cents, note) for _, pocket_id, current_cents in transfers], headers_crew)
+                for (account_id, pocket_id, _), transferred in zip(transfers, results):
+                    if transferred is None:
+                        fallback.append((account_id, pocket_id))
+                    elif transferred:
+                        _pocket_deletions.put(pocket_id)
+                    else:
+                        logger.warning("Returning funds failed for account %s; keeping its pocket", account_id)
 
-                    # Delete the pocket
-                    delete_subaccount_action(pocket_id)
+            futures = {
+                _pocket_release_executor.submit(release_pocket, pocket_id, None, checking_subaccount_id, headers_crew, note): account_id
+                for account_id, pocket_id in fallback
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
                 except Exception as e:
-                    print(f"Warning: Error deleting pocket for account {account_id}: {e}")
-
-        # Delete all SimpleFin configs and transactions
-        c.execute("DELETE FROM credit_card_config WHERE provider = 'simplefin'")
-        c.execute("DELETE FROM credit_card_transactions WHERE account_id IN (SELECT account_id FROM credit_card_config WHERE provider = 'simplefin')")
-
-        # Delete the SimpleFin access URL (complete disconnect)
-        c.execute("DELETE FROM simplefin_config")
-
-        conn.commit()
-        conn.close()
-
-        cache.clear()
+                    logger.warning("Error releasing pocket for account %s: %s", futures[future], e)
+
+        # Delete all SimpleFin transactions (by the account IDs read above, chunked under the
+        # parameter limit), configs and the access URL as one transaction with a single commit
+        with db_write() as c:
+            for chunk in batched(account_ids, SQLITE_MAX_PARAMS):
+                c.execute(f"DELETE FROM credit_card_transactions WHERE account_id IN ({','.join('?' * len(chunk))})", chunk)
+            c.execute(SQL_DELETE_SIMPLEFIN_ACCOUNTS)
+            c.execute(SQL_DELETE_SIMPLEFIN_CONFIG)  # Complete disconnect
+
+        # Only SimpleFin data and the pocket-derived views changed; the rest of the cache stays warm
+        cache.delete_prefix("simplefin", *POCKET_CACHE_PREFIXES)
         return jsonify({"success": True, "message": "SimpleFin completely disconnected. All pockets deleted and funds returned."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -3447,11 +3813,9 @@ def api_get_simplefin_sync_schedule():
     """Get the current SimpleFin sync schedule setting"""
     import json
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT sync_times, sync_timezone FROM simplefin_config LIMIT 1")
-        row = c.fetchone()
-        conn.close()
+        with db_read() as c:
+            c.execute("SELECT sync_times, sync_timezone FROM simplefin_config LIMIT 1")
+            row = c.fetchone()
 
         if row and row[0]:
             sync_times = json.loads(row[0])
@@ -3483,22 +3847,19 @@ def api_set_simplefin_sync_schedule():
         return jsonify({"error": "syncTimes array is required"}), 400
 
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        with db_write() as c:
+            c.execute("SELECT id FROM simplefin_config LIMIT 1")
+            existing = c.fetchone()
 
-        c.execute("SELECT id FROM simplefin_config LIMIT 1")
-        existing = c.fetchone()
+            if existing:
+                c.execute("UPDATE simplefin_config SET sync_times = ?, sync_timezone = ? WHERE id = ?",
+                         (json.dumps(sync_times), sync_timezone, existing[0]))
 
-        if existing:
-            c.execute("UPDATE simplefin_config SET sync_times = ?, sync_timezone = ? WHERE id = ?",
-                     (json.dumps(sync_times), sync_timezone, existing[0]))
-        else:
+        if not existing:
             return jsonify({"error": "SimpleFin not configured"}), 400
 
-        conn.commit()
-        conn.close()
-
         cache.clear()
+        wake_transaction_checker()  # Re-evaluate the new schedule now
 
         return jsonify({
             "success": True,
@@ -3512,71 +3873,90 @@ def api_set_simplefin_sync_schedule():
 def api_simplefin_sync_now():
     """Manually trigger SimpleFin sync for all accounts"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        with db_read() as c:
+            # Get SimpleFin access URL
+            c.execute(SQL_GET_SIMPLEFIN_ACCESS_URL)
+            url_row = c.fetchone()
 
-        # Get SimpleFin access URL
-        c.execute("SELECT access_url FROM simplefin_config LIMIT 1")
-        url_row = c.fetchone()
-        access_url = url_row[0] if url_row and url_row[0] else None
+            # Get all SimpleFin accounts
+            c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE provider = 'simplefin'")
+            accounts = c.fetchall()
 
+        access_url = url_row[0] if url_row and url_row[0] else None
         if not access_url:
-            conn.close()
             return jsonify({"error": "SimpleFin not configured"}), 400
 
-        # Get all SimpleFin accounts
-        c.execute("SELECT account_id, pocket_id FROM credit_card_config WHERE provider = 'simplefin'")
-        accounts = c.fetchall()
-
         if not accounts:
-            conn.close()
             return jsonify({"error": "No SimpleFin accounts configured"}), 400
 
+        # Claim every account first, so a background tick can't reconcile the same pocket at the same time
+        claimed = {}  # account_id -> (pocket_id, previous sync timestamp)
+        for account_id, pocket_id in accounts:
+            should_sync, reason, previous = claim_simplefin_sync(account_id, force=True)
+            if should_sync:
+                claimed[account_id] = (pocket_id, previous)
+            else:
+                print(f"⏭️ Manual sync skipping account {account_id} ({reason})", flush=True)
+        if not claimed:
+            return jsonify({"success": True, "message": "Sync already in progress", "accountsSynced": 0})
+
         # Batch fetch all accounts in one SimpleFin request
-        global _last_simplefin_sync
         synced_count = 0
+        simplefin_data = None
+        try:
+            now_utc = datetime.now(timezone.utc)
+            start_timestamp = int(datetime(now_utc.year, now_utc.month, 1, tzinfo=timezone.utc).timestamp())
+            end_year, end_month = (now_utc.year + 1, 1) if now_utc.month == 12 else (now_utc.year, now_utc.month + 1)
+            end_timestamp = int(datetime(end_year, end_month, 1, tzinfo=timezone.utc).timestamp())
+            params = [
+                ('start-date', start_timestamp),
+                ('end-date', end_timestamp),
+                ('pending', 1),
+            ]
+            for account_id in claimed:
+                params.append(('account', account_id))
 
-        from datetime import datetime, timezone
-        now_utc = datetime.now(timezone.utc)
-        start_timestamp = int(datetime(now_utc.year, now_utc.month, 1, tzinfo=timezone.utc).timestamp())
-        end_year, end_month = (now_utc.year + 1, 1) if now_utc.month == 12 else (now_utc.year, now_utc.month + 1)
-        end_timestamp = int(datetime(end_year, end_month, 1, tzinfo=timezone.utc).timestamp())
-        params = [
-            ('start-date', start_timestamp),
-            ('end-date', end_timestamp),
-            ('pending', 1),
-        ]
-        for account_id, _ in accounts:
-            params.append(('account', account_id))
-
-        print(f"📡 Manual sync: batch fetching {len(accounts)} SimpleFin account(s) in one request", flush=True)
-        response = requests.get(f"{access_url}/accounts", params=params, timeout=60)
-        if response.status_code != 200:
-            print(f"❌ SimpleFin API error: {response.status_code} - {response.text}", flush=True)
-            if response.status_code == 403:
-                c.execute("UPDATE simplefin_config SET is_valid = 0")
-                conn.commit()
-            conn.close()
-            return jsonify({"error": f"SimpleFin API error: {response.status_code}"}), 400
-
-        simplefin_data = response.json()
-        print(f"✅ SimpleFin batch fetch returned {len(simplefin_data.get('accounts', []))} accounts", flush=True)
+            print(f"📡 Manual sync: batch fetching {len(claimed)} SimpleFin account(s) in one request", flush=True)
+            response = _crew_session.get(f"{access_url}/accounts", params=params, timeout=60)
+            if response.status_code != 200:
+                print(f"❌ SimpleFin API error: {response.status_code} - {response.text}", flush=True)
+                if response.status_code == 403:
+                    with db_write() as c:
+                        c.execute("UPDATE simplefin_config SET is_valid = 0")
+                return jsonify({"error": f"SimpleFin API error: {response.status_code}"}), 400
 
-        for account_id, pocket_id in accounts:
-            try:
-                check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, prefetched_data=simplefin_data)
-                _last_simplefin_sync[account_id] = time.time()
-                synced_count += 1
-            except Exception as e:
-                print(f"Error syncing account {account_id}: {e}")
+            simplefin_data = parse_json(response)
+            print(f"✅ SimpleFin batch fetch returned {len(simplefin_data.get('accounts', []))} accounts", flush=True)
+        finally:
+            # Nothing was synced - release the claims so these accounts are retried later
+            if simplefin_data is None:
+                for account_id, (_, previous) in claimed.items():
+                    release_simplefin_sync(account_id, previous)
+
+        # Processing can move money, so it uses its own connection rather than holding the shared writer
+        any_changes = False
+        conn = _db()
+        try:
+            c = conn.cursor()
+            for account_id, (pocket_id, _) in claimed.items():
+                try:
+                    if check_simplefin_transactions(conn, c, account_id, pocket_id, access_url, prefetched_data=simplefin_data):
+                        any_changes = True
+                    synced_count += 1
+                except Exception as e:
+                    print(f"Error syncing account {account_id}: {e}")
+                finally:
+                    mark_simplefin_synced(account_id)
+        finally:
+            conn.close()
 
         # Persist last sync timestamp so the frontend can display it
         if synced_count > 0:
-            from datetime import datetime
-            c.execute("UPDATE simplefin_config SET last_sync = ?", (datetime.utcnow().isoformat() + 'Z',))
-            conn.commit()
+            with db_write() as c:
+                c.execute("UPDATE simplefin_config SET last_sync = ?", (datetime.utcnow().isoformat() + 'Z',))
 
-        conn.close()
+        if any_changes:
+            cache.delete_prefix(*POCKET_CACHE_PREFIXES)
 
         return jsonify({
             "success": True,
@@ -3589,5 +3969,6 @@ def api_simplefin_sync_now():
 if __name__ == '__main__':
     init_db()
     print("Server running on http://127.0.0.1:8080")
-    # Background thread will start automatically on first request
-    app.run(host='0.0.0.0', debug=True, port=8080)
+    # Background thread will start automatically on first request.
+    # Dev server only - the Docker image serves app:app with gunicorn (see Dockerfile)
+    app.run(host='0.0.0.0', debug=False, threaded=True, port=8080)